@@ -13,12 +13,10 @@ from flask_cors import CORS
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from scraper.pool import ScraperPool, CheckoutError, SERVICE_SCRAPER_OPTIONS
+from scraper.valsports_scraper_final import get_credentials
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -27,50 +25,47 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
+
 class ValSportsBetCaptureServiceImproved:
     """Serviço melhorado para capturar dados completos de apostas via Selenium"""
     
     def __init__(self):
         self.base_url = "https://www.valsports.net"
-        self.username = os.getenv('VALSPORTS_USERNAME', 'cairovinicius')
-        self.password = os.getenv('VALSPORTS_PASSWORD', '279999')
+        self.username, self.password = get_credentials()
+        # Navegadores longos e já logados, com a mesma fila/prazo do app.py
+        self.pool = ScraperPool(username=self.username, password=self.password, scraper_options=SERVICE_SCRAPER_OPTIONS)
         
     def capture_bet_data(self, bet_code: str) -> dict:
         """Captura dados completos de uma aposta via Selenium"""
         start_time = time.time()
-        driver = None
+        scraper = None
         
         try:
             logger.info(f"🎯 Iniciando captura de dados para bilhete: {bet_code}")
             
-            # 1. Configurar driver
-            firefox_options = Options()
-            firefox_options.add_argument("--headless")
-            firefox_options.add_argument("--no-sandbox")
-            firefox_options.add_argument("--disable-dev-shm-usage")
-            firefox_options.add_argument("--window-size=1920,1080")
-            
-            driver = webdriver.Firefox(options=firefox_options)
-            driver.set_page_load_timeout(30)
-            driver.implicitly_wait(10)
-            
-            # 2. Fazer login
-            logger.info("🔐 Fazendo login no sistema...")
-            login_success = self._perform_login(driver)
-            if not login_success:
+            # 1. Obter navegador logado do pool
+            try:
+                # Iniciado no primeiro uso: importar o serviço como biblioteca não abre navegadores
+                self.pool.start()
+                scraper = self.pool.checkout_logged_in()
+            except CheckoutError as e:
                 return {
                     'success': False,
-                    'error': 'Falha na autenticação',
-                    'message': 'Não foi possível fazer login no sistema'
+                    'error': 'Falha na autenticação' if e.status_code == 401 else 'Sistema ocupado',
+                    'message': e.message
                 }
+            driver = scraper.driver
             
-            # 3. Navegar para o bilhete
+            # 2. Navegar para o bilhete e aguardar a renderização
             logger.info(f"🌐 Navegando para bilhete: {bet_code}")
-            bet_url = f"{self.base_url}/prebet/{bet_code}"
-            driver.get(bet_url)
-            time.sleep(8)  # Aguardar mais tempo para carregar
+            if not scraper.open_bet_page(bet_code):
+                return {
+                    'success': False,
+                    'error': 'Falha na autenticação',
+                    'message': 'Não foi possível fazer login no sistema'
+                }
             
-            # 4. Verificar se o bilhete existe
+            # 3. Verificar se o bilhete existe
             if "não encontrado" in driver.page_source.lower() or "não existe" in driver.page_source.lower():
                 return {
                     'success': False,
@@ -78,18 +73,18 @@ class ValSportsBetCaptureServiceImproved:
                     'message': f'Bilhete {bet_code} não existe ou não foi encontrado'
                 }
             
-            # 5. Capturar dados básicos
+            # 4. Capturar dados básicos
             logger.info("📊 Capturando dados básicos do bilhete...")
             basic_data = self._capture_basic_data_improved(driver, bet_code)
             
-            # 6. Capturar dados dos jogos com análise profunda
+            # 5. Capturar dados dos jogos com análise profunda
             logger.info("🎮 Capturando dados dos jogos com análise profunda...")
             games_data = self._capture_games_data_improved(driver)
             
-            # 7. Calcular tempo de execução
+            # 6. Calcular tempo de execução
             execution_time = f"{time.time() - start_time:.2f}s"
             
-            # 8. Montar resposta final
+            # 7. Montar resposta final
             response_data = {
                 "bet_code": bet_code,
                 "bet_value": basic_data.get('bet_value', ''),
@@ -120,50 +115,8 @@ class ValSportsBetCaptureServiceImproved:
                 'execution_time': execution_time
             }
         finally:
-            if driver:
-                driver.quit()
-    
-    def _perform_login(self, driver) -> bool:
-        """Realiza login no sistema"""
-        try:
-            # Acessar página de login
-            driver.get(f"{self.base_url}/login")
-            time.sleep(3)
-            
-            wait = WebDriverWait(driver, 15)
-            
-            # Preencher usuário
-            username_field = wait.until(EC.presence_of_element_located(
-                (By.CSS_SELECTOR, ".form-group:nth-child(1) > .form-control")
-            ))
-            username_field.clear()
-            username_field.send_keys(self.username)
-            
-            # Preencher senha
-            password_field = driver.find_element(By.CSS_SELECTOR, ".form-group:nth-child(2) > .form-control")
-            password_field.clear()
-            password_field.send_keys(self.password)
-            
-            # Clicar no botão de login
-            login_button = driver.find_element(By.CSS_SELECTOR, ".btn-success")
-            login_button.click()
-            time.sleep(5)
-            
-            # Verificar se login foi bem-sucedido
-            if "login" in driver.current_url.lower():
-                logger.error("❌ Login falhou - ainda na página de login")
-                return False
-            
-            if "betsnow.net" in driver.current_url:
-                logger.error("❌ Login falhou - redirecionado para proteção")
-                return False
-            
-            logger.info("✅ Login realizado com sucesso")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Erro durante login: {str(e)}")
-            return False
+            if scraper:
+                self.pool.release_scraper(scraper)
     
     def _capture_basic_data_improved(self, driver, bet_code: str) -> dict:
         """Captura dados básicos do bilhete com seletores melhorados"""
@@ -570,6 +523,7 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'ValSports Bet Capture Service (Improved)',
+        'pool': capture_service.pool.get_stats(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -616,4 +570,6 @@ def capture_bet_get(bet_code):
 
 if __name__ == '__main__':
     logger.info("🚀 Iniciando ValSports Bet Capture Service (Improved)...")
-    app.run(host='0.0.0.0', port=5006, debug=True)
+    capture_service.pool.start()
+    # Sem reloader: ele subiria um segundo processo com outro pool de navegadores
+    app.run(host='0.0.0.0', port=5006, debug=True, use_reloader=False)
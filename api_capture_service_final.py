@@ -12,7 +12,8 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
 from dotenv import load_dotenv
-from scraper.valsports_scraper_final import ValSportsScraper
+from scraper.pool import ScraperPool, CheckoutError, SERVICE_SCRAPER_OPTIONS
+from scraper.valsports_scraper_final import get_credentials
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -21,12 +22,14 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
+
 class ValSportsCaptureService:
     """Serviço de captura baseado na implementação funcional"""
     
     def __init__(self):
-        self.username = os.getenv('VALSPORTS_USERNAME', 'cairovinicius')
-        self.password = os.getenv('VALSPORTS_PASSWORD', '279999')
+        self.username, self.password = get_credentials()
+        # Navegadores longos e já logados, com a mesma fila/prazo do app.py
+        self.pool = ScraperPool(username=self.username, password=self.password, scraper_options=SERVICE_SCRAPER_OPTIONS)
         
     def capture_bet_data(self, bet_code: str) -> dict:
         """Captura dados de uma aposta usando a implementação funcional"""
@@ -36,21 +39,19 @@ class ValSportsCaptureService:
         try:
             logger.info(f"🎯 Capturando dados do bilhete: {bet_code}")
             
-            # 1. Criar instância do scraper
-            scraper = ValSportsScraper()
-            
-            # 2. Fazer login
-            logger.info("🔐 Fazendo login no sistema...")
-            login_success = scraper.login(self.username, self.password)
-            
-            if not login_success:
+            # 1. Obter scraper logado do pool
+            try:
+                # Iniciado no primeiro uso: importar o serviço como biblioteca não abre navegadores
+                self.pool.start()
+                scraper = self.pool.checkout_logged_in()
+            except CheckoutError as e:
                 return {
                     'success': False,
-                    'error': 'Falha na autenticação',
-                    'message': 'Credenciais inválidas ou erro no login'
+                    'error': 'Falha na autenticação' if e.status_code == 401 else 'Sistema ocupado',
+                    'message': e.message
                 }
             
-            # 3. Capturar dados do bilhete
+            # 2. Capturar dados do bilhete
             logger.info(f"🌐 Capturando dados do bilhete: {bet_code}")
             bet_data = scraper.scrape_bet_ticket(bet_code)
             
@@ -61,10 +62,10 @@ class ValSportsCaptureService:
                     'message': f'Não foi possível capturar dados do bilhete {bet_code}'
                 }
             
-            # 4. Calcular tempo de execução
+            # 3. Calcular tempo de execução
             execution_time = f"{time.time() - start_time:.2f}s"
             
-            # 5. Formatar resposta no formato especificado
+            # 4. Formatar resposta no formato especificado
             formatted_data = self._format_response_data(bet_data, bet_code)
             
             logger.info(f"✅ Dados capturados com sucesso em {execution_time}")
@@ -90,10 +91,7 @@ class ValSportsCaptureService:
             }
         finally:
             if scraper:
-                try:
-                    scraper.close()
-                except:
-                    pass
+                self.pool.release_scraper(scraper)
     
     def _format_response_data(self, bet_data: dict, bet_code: str) -> dict:
         """Formata os dados para o formato especificado"""
@@ -152,6 +150,7 @@ def health_check():
         'status': 'healthy',
         'service': 'ValSports Capture Service (Final)',
         'implementation': 'Based on commit b2cc471',
+        'pool': capture_service.pool.get_stats(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -246,4 +245,6 @@ if __name__ == '__main__':
     logger.info(f"🌐 Serviço rodando na porta: {port}")
     logger.info(f"🔧 Modo debug: {debug}")
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    capture_service.pool.start()
+    # Sem reloader: ele subiria um segundo processo com outro pool de navegadores
+    app.run(host='0.0.0.0', port=port, debug=debug, use_reloader=False)
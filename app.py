@@ -1,11 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from scraper.valsports_scraper_final import ValSportsScraper
+from scraper.pool import ScraperPool, CheckoutError, POOL_SIZE, POOL_WARMUP
+from scraper.http_capture import HttpCaptureEngine, to_float
+from scraper.ticket_html_parser import parse_ticket_html
+from scraper.result_cache import TicketCache
+from scraper.single_flight import SingleFlight
+from scraper.jobs import JobManager, JobRejected, InvalidCallbackUrl
+from scraper.debug_artifacts import debug_artifacts
+from scraper.selector_registry import selector_registry
+from scraper import metrics
+from scraper import tracing
 import logging
 import time
-import threading
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -19,107 +30,79 @@ app = Flask(__name__)
 # Configuração de CORS
 CORS(app)
 
-# Pool de scrapers para gerenciar concorrência
-scraper_pool = []
-scraper_pool_lock = threading.Lock()
-POOL_SIZE = 3  # Máximo de 3 instâncias simultâneas
-POOL_TIMEOUT = 300  # 5 minutos
-
-class ScraperPool:
-    """Pool de scrapers para gerenciar múltiplas instâncias simultâneas"""
-
-    def __init__(self, pool_size=POOL_SIZE):
-        self.pool_size = pool_size
-        self.pool = []
-        self.lock = threading.Lock()
-        self.logger = logging.getLogger(__name__)
-
-    def get_scraper(self):
-        """Obtém uma instância do scraper do pool ou cria uma nova"""
-        with self.lock:
-            # Procurar instância disponível
-            for scraper_info in self.pool:
-                scraper, last_used, in_use = scraper_info
-                if not in_use:
-                    current_time = time.time()
-                    # Verificar se expirou
-                    if current_time - last_used > POOL_TIMEOUT:
-                        try:
-                            scraper.close()
-                        except:
-                            pass
-                        self.pool.remove(scraper_info)
-                        continue
-
-                    # Marcar como em uso
-                    scraper_info[2] = True
-                    scraper_info[1] = current_time
-                    self.logger.info(f"Reutilizando scraper do pool (total: {len(self.pool)})")
-                    return scraper
-
-            # Se não encontrou disponível e pool não está cheio, criar nova
-            if len(self.pool) < self.pool_size:
-                scraper = ValSportsScraper()
-                self.pool.append([scraper, time.time(), True])
-                self.logger.info(f"Nova instância criada no pool (total: {len(self.pool)})")
-                return scraper
-
-            # Se pool está cheio, aguardar por uma instância livre
-            self.logger.warning("Pool de scrapers cheio, aguardando liberação...")
-            # Retornar None se não conseguir uma instância
-            return None
-
-    def release_scraper(self, scraper):
-        """Libera uma instância do scraper de volta ao pool"""
-        with self.lock:
-            for scraper_info in self.pool:
-                if scraper_info[0] == scraper:
-                    scraper_info[2] = False
-                    scraper_info[1] = time.time()
-                    self.logger.info(f"Scraper liberado no pool")
-                    return
-
-    def cleanup_expired(self):
-        """Limpa instâncias expiradas do pool"""
-        with self.lock:
-            current_time = time.time()
-            expired = []
-            for scraper_info in self.pool:
-                scraper, last_used, in_use = scraper_info
-                if current_time - last_used > POOL_TIMEOUT:
-                    expired.append(scraper_info)
-
-            for scraper_info in expired:
-                try:
-                    scraper_info[0].close()
-                except:
-                    pass
-                self.pool.remove(scraper_info)
-
-            if expired:
-                self.logger.info(f"Limpou {len(expired)} scrapers expirados")
-
-    def close_all(self):
-        """Fecha todas as instâncias do pool"""
-        with self.lock:
-            for scraper_info in self.pool:
-                try:
-                    scraper_info[0].close()
-                except:
-                    pass
-            self.pool.clear()
-
-# Instância global do pool
-scraper_pool_manager = ScraperPool()
-
-def get_scraper():
-    """Obtém uma instância do scraper do pool"""
-    return scraper_pool_manager.get_scraper()
+HTTP_CAPTURE = os.environ.get('HTTP_CAPTURE', 'True').lower() == 'true'  # Captura direta no backend, sem navegador
+OFFLINE_PARSE = os.environ.get('OFFLINE_PARSE', 'True').lower() == 'true'  # Analisar o HTML após liberar o navegador
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 60))  # Validade dos bilhetes em cache (0 desativa)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))  # Máximo de bilhetes em cache (LRU)
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')  # Cache compartilhado entre workers (opcional)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', POOL_SIZE))  # Workers executando jobs assíncronos
+JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT', 120))  # Prazo de execução de um job (confirmações nunca expiram em execução)
+JOB_QUEUE_TIMEOUT = float(os.environ.get('JOB_QUEUE_TIMEOUT', JOB_TIMEOUT))  # Prazo de um job aguardando na fila
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 3600))  # Tempo que jobs finalizados ficam consultáveis
+JOB_MAX_QUEUE = int(os.environ.get('JOB_MAX_QUEUE', 100))  # Máximo de jobs aguardando na fila
+BATCH_MAX_CODES = int(os.environ.get('BATCH_MAX_CODES', 50))  # Máximo de bilhetes por requisição em lote
+SCRAPER_TABS = int(os.environ.get('SCRAPER_TABS', 1))  # Bilhetes do lote carregados em abas de um mesmo navegador
+EXPECTED_VALUE_TOLERANCE = float(os.environ.get('EXPECTED_VALUE_TOLERANCE', 0.01))  # Diferença aceita em odds/prêmio esperados
+
+# Motor de captura HTTP compartilhado (usa a sessão dos scrapers logados)
+http_capture_engine = HttpCaptureEngine(pool_maxsize=POOL_SIZE * 2)
+
+# Cache de bilhetes capturados (consultas repetidas do mesmo código)
+ticket_cache = TicketCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, redis_url=CACHE_REDIS_URL)
+
+# Capturas simultâneas do mesmo bilhete compartilham uma única execução
+capture_flight = SingleFlight()
+
+# Jobs assíncronos de captura/confirmação (workers usam o pool de scrapers)
+job_manager = JobManager(workers=JOB_WORKERS, job_timeout=JOB_TIMEOUT, retention=JOB_RETENTION, max_queue=JOB_MAX_QUEUE,
+                         queue_timeout=JOB_QUEUE_TIMEOUT)
+
+# Instância global do pool (pool de scrapers para gerenciar concorrência)
+scraper_pool_manager = ScraperPool(on_login=lambda scraper: http_capture_engine.load_session_from_driver(scraper.driver))
+
+# Estado do pool lido a cada coleta do /metrics
+metrics.Gauge('valsports_pool_size', 'Tamanho máximo do pool de scrapers', lambda: scraper_pool_manager.pool_size)
+metrics.Gauge(
+    'valsports_pool_instances', 'Instâncias do pool por estado',
+    lambda: {(state,): value for state, value in scraper_pool_manager.get_stats().items() if state in ('in_use', 'idle', 'warming')},
+    ('state',)
+)
+metrics.Gauge('valsports_pool_queue_depth', 'Requisições aguardando uma instância do pool', lambda: scraper_pool_manager.get_stats()['queue_depth'])
+
+def get_scraper(timeout=None, affinity=None):
+    """Obtém uma instância do scraper do pool, aguardando até o prazo se estiver cheio"""
+    return scraper_pool_manager.get_scraper(timeout, affinity)
 
 def release_scraper(scraper):
     """Libera uma instância do scraper de volta ao pool"""
     scraper_pool_manager.release_scraper(scraper)
 
+@app.before_request
+def label_request_metrics():
+    """Rotula as métricas da requisição com o endpoint do Flask"""
+    metrics.set_endpoint(request.endpoint or 'unknown')
+
+@app.before_request
+def start_request_trace():
+    """Abre o span raiz da requisição (X-Request-ID do cliente ou um id novo)"""
+    g.trace_span = tracing.start_request(
+        f"{request.method} {request.path}",
+        request_id=request.headers.get('X-Request-ID'),
+        **{'http.method': request.method, 'http.route': request.endpoint or 'unknown'}
+    )
+
+@app.after_request
+def end_request_trace(response):
+    """Fecha o span raiz e devolve o id da requisição ao cliente"""
+    span = g.pop('trace_span', None)
+    if span is not None:
+        if response.status_code >= 500:
+            span.record_error(f"HTTP {response.status_code}")
+        tracing.end_request(span, **{'http.status_code': response.status_code})
+        if span.request_id:
+            response.headers['X-Request-ID'] = span.request_id
+    return response
+
 # Tratamento de erros global
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -146,9 +129,21 @@ def health_check():
         'status': 'healthy',
         'service': 'valsports-scraper-api',
         'version': '1.0.0',
-        'timestamp': '2025-08-19 15:05:00'
+        'timestamp': '2025-08-19 15:05:00',
+        'pool': scraper_pool_manager.get_stats(),
+        'cache': ticket_cache.get_stats(),
+        'single_flight': capture_flight.get_stats(),
+        'jobs': job_manager.get_stats(),
+        'debug_artifacts': debug_artifacts.get_stats(),
+        'tracing': tracing.exporter.get_stats(),
+        'selectors': selector_registry.get_stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/', methods=['GET'])
 def root():
     """Endpoint raiz para teste"""
@@ -157,10 +152,14 @@ def root():
         'status': 'running',
         'endpoints': {
             'health': '/health',
+            'metrics': '/metrics',
             'scrape_bet': '/api/scrape-bet',
             'capture_bet': '/api/capture-bet',
+            'capture_bets': '/api/capture-bets',
             'login': '/api/login',
-            'confirm_bet': '/api/confirm-bet'
+            'confirm_bet': '/api/confirm-bet',
+            'capture_and_confirm': '/api/capture-and-confirm',
+            'jobs': '/api/jobs/<job_id>'
         }
     })
 
@@ -196,6 +195,18 @@ def scrape_bet():
 
         logger.info(f"Capturando bilhete: {bet_code}")
 
+        # Consultas repetidas do mesmo bilhete são servidas do cache
+        if not data.get('force_refresh'):
+            cached_data = ticket_cache.get(bet_code)
+            if cached_data:
+                logger.info(f"Bilhete {bet_code} servido do cache")
+                return jsonify({
+                    'success': True,
+                    'data': cached_data,
+                    'bet_code': bet_code,
+                    'cached': True
+                })
+
         # Obter instância do scraper do pool
         scraper_instance = get_scraper()
         if not scraper_instance:
@@ -213,10 +224,13 @@ def scrape_bet():
                 'error': 'Não foi possível capturar dados do bilhete'
             }), 404
 
+        ticket_cache.set(bet_code, bet_data)
+
         return jsonify({
             'success': True,
             'data': bet_data,
-            'bet_code': bet_code
+            'bet_code': bet_code,
+            'cached': False
         })
 
     except Exception as e:
@@ -281,10 +295,89 @@ def login():
         if scraper_instance:
             release_scraper(scraper_instance)
 
+class TicketError(Exception):
+    """Falha de captura/confirmação com o status HTTP correspondente"""
+
+    def __init__(self, message, status_code, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details or {}  # Campos extras da resposta de erro (ex.: verification)
+
+def checkout_logged_in_scraper(affinity=None):
+    """Obtém um scraper do pool já logado; levanta TicketError (429/401) se não for possível"""
+    try:
+        return scraper_pool_manager.checkout_logged_in(affinity=affinity)
+    except CheckoutError as e:
+        raise TicketError(e.message, e.status_code)
+
+def confirmation_error(verification):
+    """TicketError da confirmação não aceita (400) ou sem resultado conclusivo (502)"""
+    verification = verification or {'status': 'failed', 'source': 'engine', 'evidence': {}}
+    if verification['status'] == 'unknown':
+        # Não repetir às cegas: a aposta pode ter sido registrada
+        return TicketError('Resultado da confirmação indeterminado - confira o bilhete antes de tentar novamente', 502, {'verification': verification})
+    return TicketError('Não foi possível confirmar o bilhete', 400, {'verification': verification})
+
+def confirm_ticket(bet_code):
+    """Confirma o bilhete em um scraper do pool e retorna (horário, verificação)
+
+    Levanta TicketError com o status HTTP quando não é possível confirmar.
+    """
+    # A confirmação muda o estado do bilhete: descartar a captura em cache
+    ticket_cache.invalidate(bet_code)
+
+    scraper_instance = None
+    try:
+        # Preferir o scraper que acabou de capturar este bilhete (página /prebet já aberta)
+        scraper_instance = checkout_logged_in_scraper(affinity=bet_code)
+
+        # Confirmar bilhete
+        logger.info(f"Confirmando bilhete: {bet_code}")
+        if not scraper_instance.confirm_bet(bet_code):
+            raise confirmation_error(scraper_instance.last_verification)
+
+        return time.strftime('%Y-%m-%d %H:%M:%S'), scraper_instance.last_verification
+
+    finally:
+        # Capturas feitas durante a confirmação também ficam desatualizadas
+        ticket_cache.invalidate(bet_code)
+        # Sempre liberar a instância de volta ao pool
+        if scraper_instance:
+            release_scraper(scraper_instance)
+
+def submit_job(job_type, bet_code, function, callback_url=None, state_changing=False):
+    """Enfileira a operação e responde 202 com o id do job"""
+    parent_span = tracing.current_span()
+
+    def labeled_function():
+        with metrics.endpoint(f'job:{job_type}'), tracing.attach(parent_span), tracing.span(f'job.{job_type}', bet_code=bet_code):
+            return function()
+
+    try:
+        job = job_manager.submit(job_type, bet_code, labeled_function, callback_url, state_changing)
+    except JobRejected as e:
+        metrics.REJECTIONS.inc(endpoint=metrics.current_endpoint(), reason='job_queue_full')
+        return jsonify({
+            'status': 'error',
+            'message': f'Sistema ocupado. Tente novamente em alguns segundos. ({str(e)})'
+        }), 429
+    except InvalidCallbackUrl as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job.id,
+        'job_url': f'/api/jobs/{job.id}',
+        'bet_code': bet_code
+    }), 202
+
 @app.route('/api/confirm-bet', methods=['POST'])
 def confirm_bet():
     """Endpoint para confirmar bilhete após pagamento aprovado"""
-    scraper_instance = None
     try:
         data = request.get_json()
 
@@ -298,64 +391,114 @@ def confirm_bet():
 
         logger.info(f"Confirmando bilhete: {bet_code}")
 
-        # Obter credenciais do ambiente
-        username = os.environ.get('VALSORTS_USERNAME', 'cairovinicius')
-        password = os.environ.get('VALSORTS_PASSWORD', '279999')
-
-        # Obter instância do scraper do pool
-        scraper_instance = get_scraper()
-        if not scraper_instance:
-            return jsonify({
-                'status': 'error',
-                'message': 'Sistema ocupado. Tente novamente em alguns segundos.'
-            }), 429
-
-        # Fazer login automático (se necessário)
-        if not scraper_instance.is_logged_in:
-            logger.info(f"Fazendo login para usuário: {username}")
-            login_success = scraper_instance.login(username, password)
+        # Modo assíncrono: retorna o id do job sem ocupar a thread do Flask
+        if data.get('async'):
+            def confirm_job():
+                confirmed_at, verification = confirm_ticket(bet_code)
+                return {'bet_code': bet_code, 'confirmed_at': confirmed_at, 'verification': verification}
+            return submit_job('confirm', bet_code, confirm_job, data.get('callback_url'), state_changing=True)
 
-            if not login_success:
-                logger.error("Falha no login")
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Falha no login - credenciais inválidas'
-                }), 401
-        else:
-            logger.info("Usando sessão existente")
-
-        # Confirmar bilhete
-        logger.info(f"Confirmando bilhete: {bet_code}")
-        confirmation_success = scraper_instance.confirm_bet(bet_code)
-
-        if confirmation_success:
-            return jsonify({
-                'status': 'success',
-                'bet_code': bet_code,
-                'message': 'Bilhete confirmado com sucesso',
-                'confirmed_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': 'Não foi possível confirmar o bilhete'
-            }), 400
+        confirmed_at, verification = confirm_ticket(bet_code)
+        return jsonify({
+            'status': 'success',
+            'bet_code': bet_code,
+            'message': 'Bilhete confirmado com sucesso',
+            'confirmed_at': confirmed_at,
+            'verification': verification
+        })
 
+    except TicketError as e:
+        return jsonify({
+            'status': 'error',
+            'message': e.message,
+            **e.details
+        }), e.status_code
     except Exception as e:
         logger.error(f"Erro ao confirmar bilhete: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': f'Erro interno: {str(e)}'
         }), 500
+
+def capture_ticket(bet_code):
+    """Captura o bilhete (HTTP, depois Selenium) e retorna (bet_data, engine)
+
+    Levanta TicketError com o status HTTP quando não é possível capturar.
+    """
+    # Tentar captura direta no backend, sem ocupar um navegador
+    if HTTP_CAPTURE and http_capture_engine.is_ready:
+        bet_data = http_capture_engine.fetch_ticket(bet_code)
+        if bet_data:
+            ticket_cache.set(bet_code, bet_data)
+            return bet_data, 'http'
+        logger.info("Captura HTTP falhou, usando Selenium")
+
+    scraper_instance = None
+    try:
+        scraper_instance = checkout_logged_in_scraper()
+
+        # Capturar dados do bilhete
+        logger.info(f"Capturando dados do bilhete: {bet_code}")
+        if OFFLINE_PARSE:
+            bet_data = None
+            snapshot = scraper_instance.snapshot_bet_ticket(bet_code)
+
+            # Reaproveitar sessão e URL do backend nas próximas capturas HTTP
+            if snapshot and HTTP_CAPTURE:
+                http_capture_engine.learn_from_driver(scraper_instance.driver, bet_code)
+
+            # Devolver o navegador ao pool antes de analisar o HTML
+            release_scraper(scraper_instance)
+            scraper_instance = None
+
+            if snapshot:
+                with metrics.phase('extraction'):
+                    bet_data = parse_ticket_html(
+                        snapshot['html'], bet_code,
+                        bettor_name=snapshot['bettor_name'], bet_value=snapshot['bet_value']
+                    )
+
+            if snapshot and (not bet_data or not bet_data['games']):
+                # Snapshot sem bilhete reconhecível: usar a extração completa no navegador
+                logger.info("Análise offline sem jogos, usando extração no navegador")
+                debug_artifacts.save_html(f"offline_parse_{bet_code}", snapshot['html'], failed=True)
+                # De preferência o mesmo navegador, que ainda está com o bilhete aberto
+                scraper_instance = checkout_logged_in_scraper(affinity=bet_code)
+                bet_data = scraper_instance.scrape_bet_ticket(bet_code, reuse_page=True)
+        else:
+            bet_data = scraper_instance.scrape_bet_ticket(bet_code)
+
+            # Reaproveitar sessão e URL do backend nas próximas capturas HTTP
+            if bet_data and HTTP_CAPTURE:
+                http_capture_engine.learn_from_driver(scraper_instance.driver, bet_code)
+
+        if not bet_data:
+            logger.error(f"Falha ao capturar dados do bilhete: {bet_code}")
+            raise TicketError('Falha ao capturar dados do bilhete', 404)
+
+        ticket_cache.set(bet_code, bet_data)
+        return bet_data, 'selenium'
+
     finally:
         # Sempre liberar a instância de volta ao pool
         if scraper_instance:
             release_scraper(scraper_instance)
 
+def lookup_ticket(bet_code, force_refresh=False):
+    """Retorna (bet_data, engine, compartilhado) usando o cache e o single-flight"""
+    # Consultas repetidas do mesmo bilhete são servidas do cache
+    if not force_refresh:
+        bet_data = ticket_cache.get(bet_code)
+        if bet_data:
+            return bet_data, 'cache', False
+
+    # Requisições simultâneas do mesmo bilhete aguardam uma única captura
+    (bet_data, engine), shared = capture_flight.do(bet_code, lambda: capture_ticket(bet_code))
+    return bet_data, engine, shared
+
 @app.route('/api/capture-bet', methods=['POST'])
 def capture_bet():
     """Endpoint otimizado: Login + Captura em uma única operação"""
-    scraper_instance = None
     try:
         start_time = time.time()
         data = request.get_json()
@@ -370,83 +513,322 @@ def capture_bet():
 
         logger.info(f"Capturando bilhete: {bet_code}")
 
-        # Obter credenciais do ambiente
-        username = os.environ.get('VALSORTS_USERNAME', 'cairovinicius')
-        password = os.environ.get('VALSORTS_PASSWORD', '279999')
+        # Modo assíncrono: retorna o id do job sem ocupar a thread do Flask
+        if data.get('async'):
+            def capture_job():
+                bet_data, engine, _ = lookup_ticket(bet_code, data.get('force_refresh'))
+                return {'bet_code': bet_code, 'data': bet_data, 'engine': engine}
+            return submit_job('capture', bet_code, capture_job, data.get('callback_url'))
 
-        # Obter instância do scraper do pool
-        scraper_instance = get_scraper()
-        if not scraper_instance:
-            return jsonify({
-                'status': 'error',
-                'message': 'Sistema ocupado. Tente novamente em alguns segundos.'
-            }), 429
-
-        # Fazer login automático (se necessário)
-        if not scraper_instance.is_logged_in:
-            logger.info(f"Fazendo login para usuário: {username}")
-            login_success = scraper_instance.login(username, password)
-
-            if not login_success:
-                logger.error("Falha no login")
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Falha no login - credenciais inválidas'
-                }), 401
-        else:
-            logger.info("Usando sessão existente")
-
-        # Capturar dados do bilhete
-        logger.info(f"Capturando dados do bilhete: {bet_code}")
-        bet_data = scraper_instance.scrape_bet_ticket(bet_code)
-
-        if not bet_data:
-            logger.error(f"Falha ao capturar dados do bilhete: {bet_code}")
-            return jsonify({
-                'status': 'error',
-                'message': 'Falha ao capturar dados do bilhete'
-            }), 404
+        bet_data, engine, shared = lookup_ticket(bet_code, data.get('force_refresh'))
 
         execution_time = time.time() - start_time
-        logger.info(f"Dados capturados com sucesso para bilhete: {bet_code} em {execution_time:.2f}s")
+        logger.info(f"Dados capturados com sucesso para bilhete: {bet_code} em {execution_time:.2f}s ({engine})")
 
         return jsonify({
             'status': 'success',
             'bet_code': bet_code,
             'data': bet_data,
             'message': 'Dados capturados com sucesso',
-            'execution_time': f"{execution_time:.2f}s"
+            'execution_time': f"{execution_time:.2f}s",
+            'engine': engine,
+            'shared': shared
         })
 
+    except TicketError as e:
+        return jsonify({
+            'status': 'error',
+            'message': e.message
+        }), e.status_code
     except Exception as e:
         logger.error(f"Erro ao capturar bilhete: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': f'Erro interno: {str(e)}'
         }), 500
+
+def check_expected_values(bet_data, expected):
+    """Compara odds/prêmio capturados com os valores esperados pelo cliente; retorna as divergências"""
+    mismatches = {}
+    for field in ('total_odds', 'possible_prize'):
+        if expected.get(field) in (None, ''):
+            continue
+        expected_value = to_float(expected[field])
+        captured_value = to_float(bet_data.get(field))
+        if expected_value is None or captured_value is None or abs(expected_value - captured_value) > EXPECTED_VALUE_TOLERANCE:
+            mismatches[field] = {'expected': expected[field], 'captured': bet_data.get(field, '')}
+    return mismatches
+
+def capture_and_confirm_ticket(bet_code, expected=None):
+    """Captura e confirma o bilhete no mesmo scraper e na mesma página
+
+    Retorna (bet_data, confirmed_at, mismatches, verification): com divergência
+    nos valores esperados o bilhete não é confirmado (confirmed_at None); se a
+    confirmação falhar, confirmed_at também é None e `verification` diz se foi
+    recusada ou ficou indeterminada. Levanta TicketError se não capturar.
+    """
+    # A confirmação muda o estado do bilhete: descartar a captura em cache
+    ticket_cache.invalidate(bet_code)
+
+    scraper_instance = None
+    try:
+        scraper_instance = checkout_logged_in_scraper(affinity=bet_code)
+
+        # Extração no próprio navegador: a página /prebet fica aberta para a confirmação
+        logger.info(f"Capturando e confirmando bilhete: {bet_code}")
+        bet_data = scraper_instance.scrape_bet_ticket(bet_code)
+        if not bet_data or not bet_data['games']:
+            logger.error(f"Falha ao capturar dados do bilhete: {bet_code}")
+            raise TicketError('Falha ao capturar dados do bilhete', 404)
+
+        if HTTP_CAPTURE:
+            http_capture_engine.learn_from_driver(scraper_instance.driver, bet_code)
+
+        mismatches = check_expected_values(bet_data, expected or {})
+        if mismatches:
+            logger.warning(f"Valores do bilhete {bet_code} divergem do esperado, não confirmando: {mismatches}")
+            return bet_data, None, mismatches, None
+
+        confirmed = scraper_instance.confirm_bet(bet_code)
+        confirmed_at = time.strftime('%Y-%m-%d %H:%M:%S') if confirmed else None
+        return bet_data, confirmed_at, {}, scraper_instance.last_verification
+
     finally:
+        ticket_cache.invalidate(bet_code)
         # Sempre liberar a instância de volta ao pool
         if scraper_instance:
             release_scraper(scraper_instance)
 
-def cleanup_expired_scrapers():
-    """Função para limpar scrapers expirados periodicamente"""
-    while True:
+@app.route('/api/capture-and-confirm', methods=['POST'])
+def capture_and_confirm():
+    """Endpoint combinado: captura + conferência opcional de odds/prêmio + confirmação em um só checkout"""
+    try:
+        start_time = time.time()
+        data = request.get_json()
+
+        if not data or 'bet_code' not in data:
+            return jsonify({
+                'status': 'error',
+                'message': 'Código do bilhete é obrigatório'
+            }), 400
+
+        bet_code = data['bet_code']
+        expected = {
+            'total_odds': data.get('expected_odds'),
+            'possible_prize': data.get('expected_prize')
+        }
+
+        logger.info(f"Capturando e confirmando bilhete: {bet_code}")
+
+        # Modo assíncrono: retorna o id do job sem ocupar a thread do Flask
+        if data.get('async'):
+            def capture_and_confirm_job():
+                bet_data, confirmed_at, mismatches, verification = capture_and_confirm_ticket(bet_code, expected)
+                return {
+                    'bet_code': bet_code,
+                    'data': bet_data,
+                    'confirmed': confirmed_at is not None,
+                    'confirmed_at': confirmed_at,
+                    'mismatches': mismatches,
+                    'verification': verification
+                }
+            return submit_job('capture_and_confirm', bet_code, capture_and_confirm_job, data.get('callback_url'), state_changing=True)
+
+        bet_data, confirmed_at, mismatches, verification = capture_and_confirm_ticket(bet_code, expected)
+
+        execution_time = time.time() - start_time
+        response = {
+            'bet_code': bet_code,
+            'data': bet_data,
+            'confirmed': confirmed_at is not None,
+            'confirmed_at': confirmed_at,
+            'verification': verification,
+            'execution_time': f"{execution_time:.2f}s"
+        }
+
+        if mismatches:
+            response.update(status='error', message='Odds ou prêmio diferentes do esperado; bilhete não confirmado', mismatches=mismatches)
+            return jsonify(response), 409
+        if not confirmed_at:
+            error = confirmation_error(verification)
+            response.update(status='error', message=error.message)
+            return jsonify(response), error.status_code
+
+        logger.info(f"Bilhete capturado e confirmado: {bet_code} em {execution_time:.2f}s")
+        response.update(status='success', message='Bilhete capturado e confirmado com sucesso')
+        return jsonify(response)
+
+    except TicketError as e:
+        return jsonify({
+            'status': 'error',
+            'message': e.message
+        }), e.status_code
+    except Exception as e:
+        logger.error(f"Erro ao capturar e confirmar bilhete: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Erro interno: {str(e)}'
+        }), 500
+
+def capture_batch_item(bet_code, force_refresh=False):
+    """Captura um bilhete do lote e retorna o resultado individual"""
+    start_time = time.time()
+    try:
+        bet_data, engine, shared = lookup_ticket(bet_code, force_refresh)
+        result = {'bet_code': bet_code, 'status': 'success', 'data': bet_data, 'engine': engine, 'shared': shared}
+    except TicketError as e:
+        result = {'bet_code': bet_code, 'status': 'error', 'message': e.message, 'status_code': e.status_code}
+    except Exception as e:
+        logger.error(f"Erro ao capturar bilhete {bet_code} do lote: {str(e)}")
+        result = {'bet_code': bet_code, 'status': 'error', 'message': f'Erro interno: {str(e)}', 'status_code': 500}
+    result['execution_time'] = f"{time.time() - start_time:.2f}s"
+    return result
+
+def capture_batch_tabs(bet_codes, force_refresh=False):
+    """Captura um grupo do lote em abas de um único scraper do pool"""
+    start_time = time.time()
+    results = []
+
+    # Bilhetes já em cache não ocupam abas
+    pending = []
+    for bet_code in bet_codes:
+        bet_data = None if force_refresh else ticket_cache.get(bet_code)
+        if bet_data:
+            results.append({'bet_code': bet_code, 'status': 'success', 'data': bet_data, 'engine': 'cache', 'shared': False})
+        else:
+            pending.append(bet_code)
+
+    if pending:
+        scraper_instance = None
         try:
-            scraper_pool_manager.cleanup_expired()
-            time.sleep(60)  # Executa a cada 60 segundos
+            scraper_instance = checkout_logged_in_scraper()
+            # Como na captura individual, cada bilhete renova a sessão e a URL do backend da captura HTTP
+            tickets = scraper_instance.scrape_bet_tickets(
+                pending, SCRAPER_TABS, on_ticket=http_capture_engine.learn_from_driver if HTTP_CAPTURE else None
+            )
+            for bet_code in pending:
+                bet_data = tickets.get(bet_code)
+                if bet_data and bet_data['games']:
+                    ticket_cache.set(bet_code, bet_data)
+                    results.append({'bet_code': bet_code, 'status': 'success', 'data': bet_data, 'engine': 'selenium', 'shared': False})
+                else:
+                    results.append({'bet_code': bet_code, 'status': 'error', 'message': 'Falha ao capturar dados do bilhete', 'status_code': 404})
+        except TicketError as e:
+            results += [{'bet_code': bet_code, 'status': 'error', 'message': e.message, 'status_code': e.status_code} for bet_code in pending]
         except Exception as e:
-            logger.error(f"Erro na limpeza de scrapers expirados: {str(e)}")
-            time.sleep(60)
+            logger.error(f"Erro ao capturar grupo do lote em abas: {str(e)}")
+            results += [{'bet_code': bet_code, 'status': 'error', 'message': f'Erro interno: {str(e)}', 'status_code': 500} for bet_code in pending]
+        finally:
+            if scraper_instance:
+                release_scraper(scraper_instance)
+
+    execution_time = f"{time.time() - start_time:.2f}s"
+    for result in results:
+        result['execution_time'] = execution_time
+    return results
+
+def iter_batch_results(bet_codes, force_refresh=False, parent_span=None):
+    """Captura os bilhetes em paralelo (até POOL_SIZE) e gera os resultados na ordem de término
+
+    `parent_span` liga as capturas ao trace da requisição: no modo streaming o
+    gerador só roda depois que o Flask já fechou o span raiz.
+    """
+    if SCRAPER_TABS > 1 and len(bet_codes) > 1:
+        # Vários bilhetes por instância em abas, distribuindo os grupos entre as instâncias do pool
+        group_size = min(SCRAPER_TABS, math.ceil(len(bet_codes) / POOL_SIZE))
+        groups = [bet_codes[index:index + group_size] for index in range(0, len(bet_codes), group_size)]
+    else:
+        groups = [[bet_code] for bet_code in bet_codes]
+
+    def capture_group(group):
+        # Threads do executor não herdam o rótulo nem o trace da requisição
+        with metrics.endpoint('capture_bets'), tracing.attach(parent_span), tracing.span('capture_batch_group', tickets=len(group)):
+            if len(group) > 1:
+                return capture_batch_tabs(group, force_refresh)
+            return [capture_batch_item(group[0], force_refresh)]
+
+    executor = ThreadPoolExecutor(max_workers=min(len(groups), POOL_SIZE), thread_name_prefix='batch')
+    try:
+        futures = [executor.submit(capture_group, group) for group in groups]
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # Cliente desconectado: não iniciar as capturas que ainda estão na fila
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@app.route('/api/capture-bets', methods=['POST'])
+def capture_bets():
+    """Endpoint em lote: captura vários bilhetes em paralelo usando o pool de scrapers
+
+    Por padrão responde em NDJSON, uma linha por bilhete assim que cada um termina,
+    seguida de uma linha de resumo. Com "stream": false retorna tudo em um único JSON.
+    """
+    data = request.get_json()
+
+    if not data or not isinstance(data.get('bet_codes'), list) or not data['bet_codes']:
+        return jsonify({
+            'status': 'error',
+            'message': 'Lista de códigos (bet_codes) é obrigatória'
+        }), 400
+
+    # Remover duplicados mantendo a ordem
+    bet_codes = list(dict.fromkeys(str(code) for code in data['bet_codes']))
+    if len(bet_codes) > BATCH_MAX_CODES:
+        return jsonify({
+            'status': 'error',
+            'message': f'Máximo de {BATCH_MAX_CODES} bilhetes por requisição'
+        }), 400
+
+    force_refresh = data.get('force_refresh', False)
+    parent_span = tracing.current_span()
+    start_time = time.time()
+    logger.info(f"Capturando lote de {len(bet_codes)} bilhetes: {', '.join(bet_codes)}")
+
+    def summary(results):
+        succeeded = sum(1 for result in results if result['status'] == 'success')
+        execution_time = time.time() - start_time
+        logger.info(f"Lote finalizado: {succeeded}/{len(bet_codes)} bilhetes em {execution_time:.2f}s")
+        return {
+            'status': 'completed',
+            'total': len(bet_codes),
+            'succeeded': succeeded,
+            'failed': len(bet_codes) - succeeded,
+            'execution_time': f"{execution_time:.2f}s"
+        }
+
+    if data.get('stream', True) is False:
+        results = list(iter_batch_results(bet_codes, force_refresh, parent_span))
+        response = summary(results)
+        response['results'] = results
+        return jsonify(response)
+
+    def generate():
+        results = []
+        for result in iter_batch_results(bet_codes, force_refresh, parent_span):
+            results.append(result)
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+        yield json.dumps(summary(results), ensure_ascii=False) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Consulta o estado e o resultado de um job assíncrono"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({
+            'status': 'error',
+            'message': 'Job não encontrado ou expirado'
+        }), 404
+
+    return jsonify(job.to_dict())
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))  # Mudando para porta 5001
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
 
-    # Iniciar thread de limpeza em background
-    cleanup_thread = threading.Thread(target=cleanup_expired_scrapers, daemon=True)
-    cleanup_thread.start()
-    logger.info("Thread de limpeza de scrapers expirados iniciada")
+    # Pré-aquecer o pool (Firefox + login) antes da primeira requisição e manter as threads de limpeza/reposição
+    scraper_pool_manager.start(POOL_WARMUP)
 
     # Configurar para aceitar tanto HTTP quanto HTTPS
     app.run(
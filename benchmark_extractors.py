@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark e Regressão dos Extratores de Bilhetes
+Roda todos os caminhos de extração contra os snapshots salvos (scraper_*.html)
+e compara com os resultados de referência (result_*.json / capture_*.json)
+
+Uso:
+    python benchmark_extractors.py                # apenas caminhos offline
+    python benchmark_extractors.py --selenium     # inclui caminhos Selenium (requer Firefox)
+    python benchmark_extractors.py --json bench.json --runs 5
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from scraper.ticket_html_parser import parse_ticket_html
+
+# Os extratores logam muito em INFO; o benchmark só mostra o relatório
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s:%(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADER_FIELDS = ['total_games', 'total_odds', 'possible_prize', 'bettor_name', 'bet_value']
+GAME_FIELDS = ['league', 'home_team', 'away_team', 'datetime', 'selection', 'odds']
+# Referências gravadas com saída ruim do scraper antigo (jogos faltando): a precisão
+# nesses bilhetes mede a referência, não o parser, e fica fora da média
+UNRELIABLE_GOLDENS = {'cbeo1c', 'ebg2cq'}
+
+
+def golden_timestamp(path):
+    """Timestamp unix do nome do arquivo (result_<código>_<ts>.json); 0 se não houver"""
+    match = re.search(r'_(\d{9,})\.json$', path)
+    return int(match.group(1)) if match else 0
+
+
+def load_fixtures():
+    """Carrega snapshots HTML e o resultado de referência mais recente de cada bilhete"""
+    fixtures = {}
+    for html_path in sorted(glob.glob(os.path.join(BASE_DIR, 'scraper_*.html'))):
+        bet_code = re.match(r'scraper_(\w+)\.html', os.path.basename(html_path)).group(1)
+        with open(html_path, encoding='utf-8') as f:
+            html = f.read()
+
+        golden = None
+        candidates = sorted(
+            glob.glob(os.path.join(BASE_DIR, f'result_{bet_code}*.json')) +
+            glob.glob(os.path.join(BASE_DIR, f'capture_{bet_code}*.json')),
+            # Pelo timestamp do nome: o mtime é igual para todos num checkout novo
+            key=lambda path: (golden_timestamp(path), os.path.basename(path))
+        )
+        for golden_path in reversed(candidates):
+            with open(golden_path, encoding='utf-8') as f:
+                data = json.load(f)
+            data = data.get('data', data)
+            if data.get('games'):
+                golden = data
+                break
+
+        fixtures[bet_code] = {'html': html, 'golden': golden, 'reliable': bet_code not in UNRELIABLE_GOLDENS}
+    return fixtures
+
+
+def normalize_game(game):
+    """Normaliza jogos no formato dos serviços (selections/odds_list) para o formato do scraper"""
+    game = dict(game)
+    if 'selection' not in game and game.get('selections'):
+        game['selection'] = game['selections'][0]
+    if 'odds' not in game and game.get('odds_list'):
+        game['odds'] = game['odds_list'][0]
+    return game
+
+
+def field_accuracy(result, golden):
+    """Percentual de campos iguais ao resultado de referência (jogos alinhados por posição)"""
+    if not golden:
+        return None
+    if not result:
+        return 0.0
+
+    total = matched = 0
+    if 'bet_code' in result:
+        for field in HEADER_FIELDS:
+            total += 1
+            matched += str(result.get(field, '')) == str(golden.get(field, ''))
+
+    games = [normalize_game(game) for game in result.get('games', [])]
+    for index, expected in enumerate(golden['games']):
+        actual = games[index] if index < len(games) else {}
+        for field in GAME_FIELDS:
+            total += 1
+            matched += str(actual.get(field, '')).strip() == str(expected.get(field, '')).strip()
+
+    return matched / total * 100 if total else None
+
+
+class FixturePage:
+    """Substitui o driver nos extratores dos serviços que só usam page_source"""
+
+    def __init__(self, html):
+        self.page_source = html
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serve /prebet/<código> a partir dos snapshots, no lugar do site real"""
+
+    fixtures = {}
+
+    def do_GET(self):
+        match = re.match(r'^/prebet/(\w+)', self.path)
+        html = self.fixtures.get(match.group(1), {}).get('html') if match else None
+        if html is None:
+            # Home, assets e demais rotas: página vazia para não bloquear o carregamento
+            html = '<html><body></body></html>' if not self.path.startswith('/js/') else ''
+
+        body = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(fixtures):
+    """Inicia o servidor HTTP local com os snapshots"""
+    FixtureHandler.fixtures = fixtures
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def offline_paths():
+    """Caminhos que analisam o HTML sem navegador"""
+    from api_bet_capture_service import ValSportsBetCaptureService
+    from api_bet_capture_improved import ValSportsBetCaptureServiceImproved
+
+    service = ValSportsBetCaptureService()
+    improved = ValSportsBetCaptureServiceImproved()
+
+    def games_only(games):
+        return {'games': games}
+
+    return {
+        'offline_html_parser': lambda code, html: parse_ticket_html(html, code),
+        'service_html_parser': lambda code, html: games_only(service._extract_games_from_html(html)),
+        'service_text_parser': lambda code, html: games_only(service._extract_games_from_text(html)),
+        'improved_text_analysis': lambda code, html: games_only(
+            improved._capture_games_from_text_analysis(FixturePage(html))),
+        'improved_html_parsing': lambda code, html: games_only(
+            improved._capture_games_from_html_parsing(FixturePage(html))),
+    }
+
+
+def selenium_paths(scraper):
+    """Caminhos que extraem do DOM no navegador"""
+    return {
+        'js_single_round_trip': lambda code: scraper._extract_bet_data_with_js(code),
+        'selectors_full': lambda code: scraper._extract_bet_data_with_selectors(code),
+        'bet_slip': lambda code: {'games': scraper._extract_games_from_bet_slip()},
+        'real_selectors': lambda code: {'games': scraper._extract_games_with_real_selectors()},
+        'dynamic': lambda code: {'games': scraper._extract_games_dynamically()},
+    }
+
+
+def install_call_counter(driver):
+    """Conta os comandos WebDriver (cada um é um round-trip HTTP ao geckodriver)"""
+    counter = {'calls': 0}
+    original_execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counter['calls'] += 1
+        return original_execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def measure(function, runs):
+    """Executa a função `runs` vezes e retorna o último resultado e a mediana em ms"""
+    timings = []
+    result = None
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return result, statistics.median(timings)
+
+
+def run_offline(fixtures, runs):
+    """Executa os caminhos offline sobre todos os snapshots"""
+    rows = []
+    for path_name, extractor in offline_paths().items():
+        for bet_code, fixture in fixtures.items():
+            result, latency = measure(lambda: extractor(bet_code, fixture['html']), runs)
+            rows.append({
+                'path': path_name,
+                'bet_code': bet_code,
+                'latency_ms': latency,
+                'webdriver_calls': 0,
+                'games': len((result or {}).get('games', [])),
+                'accuracy': field_accuracy(result, fixture['golden']),
+                'reliable_golden': fixture['reliable']
+            })
+    return rows
+
+
+def run_selenium(fixtures, runs):
+    """Executa os caminhos Selenium navegando no servidor local de snapshots"""
+    from scraper.valsports_scraper_final import ValSportsScraper
+
+    server, base_url = start_fixture_server(fixtures)
+    rows = []
+    scraper = None
+    try:
+        scraper = ValSportsScraper()
+        scraper.base_url = base_url
+        scraper.is_logged_in = True  # O servidor local não exige login
+        counter = install_call_counter(scraper.driver)
+
+        for bet_code, fixture in fixtures.items():
+            scraper.driver.get(f"{base_url}/prebet/{bet_code}")
+
+            for path_name, extractor in selenium_paths(scraper).items():
+                counter['calls'] = 0
+                result, latency = measure(lambda: extractor(bet_code), runs)
+                rows.append({
+                    'path': path_name,
+                    'bet_code': bet_code,
+                    'latency_ms': latency,
+                    'webdriver_calls': counter['calls'] // runs,
+                    'games': len((result or {}).get('games', [])),
+                    'accuracy': field_accuracy(result, fixture['golden']),
+                    'reliable_golden': fixture['reliable']
+                })
+    except Exception as e:
+        logger.error(f"❌ Caminhos Selenium indisponíveis: {str(e)}")
+    finally:
+        if scraper:
+            scraper.close()
+        server.shutdown()
+    return rows
+
+
+def print_report(rows):
+    """Imprime a tabela por caminho/bilhete e o resumo por caminho"""
+    print(f"{'caminho':<24} {'bilhete':<8} {'latência':>10} {'wd calls':>9} {'jogos':>6} {'precisão':>9}")
+    print('-' * 70)
+    for row in rows:
+        accuracy = f"{row['accuracy']:.1f}%" if row['accuracy'] is not None else '-'
+        if row['accuracy'] is not None and not row['reliable_golden']:
+            accuracy += '*'
+        print(f"{row['path']:<24} {row['bet_code']:<8} {row['latency_ms']:>8.2f}ms "
+              f"{row['webdriver_calls']:>9} {row['games']:>6} {accuracy:>9}")
+
+    print()
+    print(f"{'caminho':<24} {'latência mediana':>17} {'precisão média':>15}")
+    print('-' * 58)
+    for path_name in dict.fromkeys(row['path'] for row in rows):
+        path_rows = [row for row in rows if row['path'] == path_name]
+        scores = [row['accuracy'] for row in path_rows if row['accuracy'] is not None and row['reliable_golden']]
+        latency = statistics.median(row['latency_ms'] for row in path_rows)
+        accuracy = f"{statistics.mean(scores):.1f}%" if scores else '-'
+        print(f"{path_name:<24} {latency:>15.2f}ms {accuracy:>15}")
+    if any(row['accuracy'] is not None and not row['reliable_golden'] for row in rows):
+        print(f"\n* referência não confiável ({', '.join(sorted(UNRELIABLE_GOLDENS))}): fora da precisão média")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos extratores sobre os snapshots salvos')
+    parser.add_argument('--selenium', action='store_true', help='incluir caminhos Selenium (requer Firefox)')
+    parser.add_argument('--runs', type=int, default=3, help='execuções por caminho (mediana)')
+    parser.add_argument('--json', help='salvar resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    print(f"📋 {len(fixtures)} snapshots, {sum(1 for f in fixtures.values() if f['golden'])} com referência\n")
+
+    rows = run_offline(fixtures, args.runs)
+    if args.selenium:
+        rows += run_selenium(fixtures, args.runs)
+
+    print_report(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados salvos em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
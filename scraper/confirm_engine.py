@@ -0,0 +1,400 @@
+import logging
+import os
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from scraper import readiness
+from scraper import metrics
+from scraper import tracing
+from scraper.debug_artifacts import debug_artifacts
+from scraper.selector_registry import selector_registry
+from scraper.confirm_verifier import ConfirmVerifier, verification, FAILED, UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+# Observador único no documento: a cada mutação verifica o .v-dialog.active do topo,
+# classifica pelo texto e publica um evento (também 'closed' e 'navigated' na troca de rota do SPA).
+# Quem espera (WAIT_EVENT_SCRIPT) é acordado no mesmo instante, sem polling do WebDriver.
+INSTALL_OBSERVER_SCRIPT = """
+if (window.__valsportsDialogs) { return window.__valsportsDialogs.seq; }
+var state = window.__valsportsDialogs = {seq: 0, events: [], waiters: [], signature: null, path: location.pathname};
+
+function visible(el) { return el.offsetParent !== null || el.getClientRects().length > 0; }
+
+// Perguntas têm dois botões (Não/Sim); avisos de sucesso ou erro têm um só
+function classify(dialog, text) {
+    if (dialog.querySelector('.v-dialog-input')) { return 'search'; }
+    if (dialog.querySelectorAll('a, button').length >= 2) {
+        if (/mudan[çc]a de pr[êe]mio|cota[çc][õo]es mudaram|odds/.test(text)) { return 'odds_change'; }
+        return 'confirmation';
+    }
+    if (/erro|insuficiente|inv[áa]lid|expirad|n[ãa]o encontrad|n[ãa]o (foi|[ée]) poss[íi]vel|indispon/.test(text)) { return 'error'; }
+    if (/sucesso|confirmad[ao]|realizad[ao]/.test(text)) { return 'success'; }
+    return 'unknown';
+}
+
+function emit(type, text) {
+    state.seq += 1;
+    var event = {seq: state.seq, type: type, text: (text || '').slice(0, 300), at: Date.now()};
+    state.events.push(event);
+    if (state.events.length > 50) { state.events.shift(); }
+    state.waiters = state.waiters.filter(function (waiter) { return !waiter(event); });
+}
+
+function check() {
+    var dialogs = document.querySelectorAll('.v-dialog.active'), current = null;
+    for (var i = 0; i < dialogs.length; i++) {
+        if (visible(dialogs[i])) { current = dialogs[i]; }
+    }
+    var text = current ? (current.innerText || '').trim() : '';
+    var type = current ? classify(current, text.toLowerCase()) : 'closed';
+    var signature = current ? type + '|' + text.slice(0, 120) : null;
+    if (signature !== state.signature) {
+        var wasOpen = state.signature !== null;
+        state.signature = signature;
+        if (current || wasOpen) { emit(type, text); }
+    }
+    if (location.pathname !== state.path) {
+        state.path = location.pathname;
+        emit('navigated', location.pathname + location.search);
+    }
+}
+
+new MutationObserver(check).observe(document.documentElement, {
+    childList: true, subtree: true, attributes: true, attributeFilter: ['class', 'style']
+});
+check();
+return state.seq;
+"""
+
+# Espera assíncrona: devolve o primeiro evento após `after` (dos tipos pedidos) ou null no prazo
+WAIT_EVENT_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var after = arguments[0], types = arguments[1], timeout = arguments[2];
+var state = window.__valsportsDialogs;
+if (!state) { done({seq: after, type: 'lost', text: ''}); return; }
+
+function matches(event) { return event.seq > after && (!types || types.indexOf(event.type) !== -1); }
+
+for (var i = 0; i < state.events.length; i++) {
+    if (matches(state.events[i])) { done(state.events[i]); return; }
+}
+var finished = false;
+var timer = setTimeout(function () { finished = true; done(null); }, timeout * 1000);
+state.waiters.push(function (event) {
+    if (finished) { return true; }
+    if (!matches(event)) { return false; }
+    finished = true;
+    clearTimeout(timer);
+    done(event);
+    return true;
+});
+"""
+
+# Clica no botão afirmativo do modal do topo (classe success ou texto Sim/Confirmar/Continuar/OK)
+CLICK_DIALOG_BUTTON_SCRIPT = """
+var dialogs = document.querySelectorAll('.v-dialog.active'), dialog = null;
+for (var i = 0; i < dialogs.length; i++) {
+    if (dialogs[i].offsetParent !== null || dialogs[i].getClientRects().length) { dialog = dialogs[i]; }
+}
+if (!dialog) { return null; }
+var buttons = dialog.querySelectorAll('a, button'), fallback = null;
+for (var j = 0; j < buttons.length; j++) {
+    var button = buttons[j], label = (button.innerText || '').trim();
+    if (button.disabled || !(button.offsetParent !== null || button.getClientRects().length)) { continue; }
+    if (button.classList.contains('success')) { button.click(); return label || 'success'; }
+    if (!fallback && /^(sim|confirmar|continuar|ok)$/i.test(label)) { fallback = button; }
+}
+if (fallback) { fallback.click(); return (fallback.innerText || '').trim(); }
+return null;
+"""
+
+# Seletores por alvo lógico (a ordem é aprendida pelo selector_registry)
+PREBET_TAB_SELECTORS = [
+    "//a[contains(text(), 'Pré-aposta')]",
+    "//a[contains(text(), 'PRÉ-APOSTA')]",
+    "//a[contains(@href, '/prebet')]"
+]
+INPUT_SELECTORS = [
+    ".v-dialog-input",
+    "input.v-dialog-input",
+    "//input[@class='v-dialog-input']",
+    "//div[contains(@class, 'v-dialog')]//input[@type='text']"
+]
+SEARCH_BUTTON_SELECTORS = [
+    ".v-dialog-btn.success",
+    "a.v-dialog-btn.success",
+    "//a[contains(text(), 'Buscar')]"
+]
+BET_BUTTON_SELECTORS = [
+    ".btn-group > .text-style",
+    ".btn.text-style",
+    "button[type='button'].btn.text-style",
+    "//button[contains(text(), 'Apostar')]",
+    "//a[contains(text(), 'Apostar')]"
+]
+# Genéricos: casam com outros botões da página, então só valem depois dos específicos
+BET_BUTTON_FALLBACKS = [
+    ".btn-group button",
+    "//button[contains(text(), 'Confirmar')]",
+    "//a[contains(text(), 'Confirmar')]"
+]
+# Usados só quando o modal não tem botão afirmativo reconhecível
+YES_SELECTORS = [
+    "a.v-dialog-btn:nth-child(2)",
+    "//a[contains(text(),'Sim')]",
+    "//button[contains(text(),'Sim')]",
+    "//a[contains(text(),'SIM')]",
+    "//button[contains(text(),'SIM')]"
+]
+YES_FALLBACKS = [
+    "/html/body/div[3]/div/div[2]/div[3]/a[2]",
+    "//button[contains(@class, 'btn-success')]",
+    "//a[contains(@class, 'btn-success')]"
+]
+
+# Abrir /prebet/{código} direto; o fluxo pelo modal de busca da home fica como alternativa
+DIRECT_PREBET = os.environ.get('CONFIRM_DIRECT_PREBET', 'True').lower() == 'true'
+
+MAX_DIALOG_ANSWERS = 5  # Limite de segurança contra loops de confirmação
+FOLLOWUP_TIMEOUT = 1.5  # Após a resposta do site, prazo extra para um novo modal (ex.: mudança de prêmio)
+TERMINAL_STATES = ('confirmed', 'failed', 'unknown')
+
+
+class ConfirmEngine:
+    """Confirmação de um bilhete como máquina de estados guiada pelos modais da página
+
+    open_ticket -> place_bet -> await_dialog <-> answer_dialog -> verify
+    open_ticket cai para open_search -> enter_code (modal de busca) se a rota direta falhar.
+    Cada estado devolve o próximo; 'confirmed', 'failed' e 'unknown' encerram. Os
+    modais são reportados por um MutationObserver na página, então a máquina reage
+    assim que o site abre (ou fecha) uma caixa, em vez de esperar prazos fixos por
+    seletor. O resultado e sua evidência ficam em `verification` (ver ConfirmVerifier).
+    """
+
+    def __init__(self, driver, base_url, bet_code, dialog_timeout=10, reuse_page=False):
+        self.driver = driver
+        self.base_url = base_url
+        self.bet_code = bet_code
+        self.reuse_page = reuse_page  # A aba já mostra este bilhete (captura recente no mesmo scraper)
+        self.dialog_timeout = dialog_timeout
+        self.last_seq = 0
+        self.event = None  # Último modal recebido em await_dialog
+        self.answers = 0
+        self.followup = False  # Modal respondido e fechado: só falta ver se o site abre outro
+        self.history = []  # (estado, segundos)
+        self.verifier = ConfirmVerifier(driver, base_url, bet_code)
+        self.verification = None
+
+    def run(self):
+        """Executa a máquina até um estado final; retorna True se a aposta foi confirmada"""
+        start_time = time.time()
+        state = 'open_ticket' if DIRECT_PREBET or self.reuse_page else 'open_search'
+        while state not in TERMINAL_STATES:
+            state_start = time.time()
+            with tracing.span(f'confirm.{state}') as span:
+                next_state = getattr(self, f'_state_{state}')()
+                span.set_attribute('confirm.next_state', next_state)
+            self.history.append((state, time.time() - state_start))
+            logger.debug("Confirmação %s: %s -> %s (%.2fs)", self.bet_code, state, next_state, time.time() - state_start)
+            state = next_state
+
+        steps = ' → '.join(f"{name} {elapsed:.1f}s" for name, elapsed in self.history)
+        if self.verification:
+            steps += f"; evidência: {self.verification['source']}"
+        logger.info("🧾 Confirmação %s: %s em %.2fs (%s)", self.bet_code, state, time.time() - start_time, steps)
+        return state == 'confirmed'
+
+    # Observador de modais
+
+    def _install_observer(self):
+        self.last_seq = self.driver.execute_script(INSTALL_OBSERVER_SCRIPT) or 0
+        # A espera assíncrona precisa de folga sobre o maior prazo usado
+        self.driver.set_script_timeout(self.dialog_timeout + 5)
+
+    def _wait_event(self, types=None, timeout=None):
+        """Próximo modal/rota reportado pelo observador (None no prazo)"""
+        timeout = self.dialog_timeout if timeout is None else timeout
+        with metrics.phase('modal_handling'):
+            try:
+                event = self.driver.execute_async_script(WAIT_EVENT_SCRIPT, self.last_seq, types, timeout)
+            except WebDriverException as e:
+                # Documento recarregado durante a espera: o observador se perdeu junto
+                logger.debug("Espera de modal interrompida: %s", e)
+                event = {'seq': self.last_seq, 'type': 'lost', 'text': ''}
+        if event:
+            self.last_seq = max(self.last_seq, event['seq'])
+            logger.debug("Modal/rota reportado: %s %r", event['type'], event['text'][:80])
+        return event
+
+    # Elementos da página
+
+    def _find(self, target, selectors, timeout=10, by=None, fallbacks=()):
+        """Primeiro candidato clicável do alvo, tentando antes os seletores que mais acertaram"""
+        with tracing.span(f'confirm_bet.{target}') as span:
+            element, selector, tried = selector_registry.find_first(
+                self.driver, f'confirm.{target}', selectors, timeout, by, fallbacks=fallbacks
+            )
+            span.set_attributes({
+                'selectors.candidates': len(selectors) + len(fallbacks),
+                'selectors.tried': tried,
+                'selectors.found': element is not None
+            })
+            if element is not None:
+                span.set_attribute('selectors.matched', selector)
+            return element
+
+    def _click(self, element):
+        try:
+            element.click()
+        except Exception as click_error:
+            logger.debug("Clique normal falhou, usando JavaScript: %s", click_error)
+            self.driver.execute_script("arguments[0].click();", element)
+
+    def _fail(self, reason, message):
+        logger.error(f"❌ {message}")
+        if self.verification is None:
+            self.verification = verification(FAILED, 'engine', reason=reason, message=message)
+        debug_artifacts.capture(self.driver, f"{reason}_{self.bet_code}", failed=True)
+        return 'failed'
+
+    # Estados
+
+    def _state_open_ticket(self):
+        """Bilhete aberto pela rota /prebet/{código}, reaproveitando a página se já estiver nela"""
+        bet_path = f"/prebet/{self.bet_code}"
+
+        if self.reuse_page and bet_path in self.driver.current_url:
+            if self.driver.execute_script("return document.querySelectorAll('.l-item.d-block').length;"):
+                logger.info("♻️ Reaproveitando a página do bilhete já carregada")
+                self._install_observer()
+                return 'place_bet'
+
+        if not DIRECT_PREBET:
+            return 'open_search'
+
+        readiness.navigate(self.driver, f"{self.base_url}{bet_path}")
+        readiness.wait_for_vue_app(self.driver)
+        if readiness.wait_for_stable_count(self.driver, ".l-item.d-block", settle_time=0.2) and bet_path in self.driver.current_url:
+            self._install_observer()
+            return 'place_bet'
+
+        logger.warning("⚠️ Bilhete não abriu pela rota direta, usando o modal de busca")
+        return 'open_search'
+
+    def _state_open_search(self):
+        """Home carregada, observador instalado e modal de busca da pré-aposta aberto"""
+        readiness.navigate(self.driver, self.base_url)
+        readiness.wait_for_vue_app(self.driver)
+        self._install_observer()
+
+        prebet_tab = self._find('prebet_tab', PREBET_TAB_SELECTORS, by='xpath')
+        if not prebet_tab:
+            return self._fail('prebet_tab_not_found', "Aba PRÉ-APOSTA não encontrada")
+        self._click(prebet_tab)
+
+        if not self._wait_event(['search'], timeout=5):
+            logger.warning("⚠️ Modal de pré-aposta não detectado, continuando...")
+        return 'enter_code'
+
+    def _state_enter_code(self):
+        """Código digitado no modal e busca disparada; aguarda o bilhete carregar"""
+        bet_code_input = self._find('modal_input', INPUT_SELECTORS, timeout=5)
+        if not bet_code_input:
+            return self._fail('modal_input_not_found', "Campo para código do bilhete no modal não encontrado")
+        bet_code_input.clear()
+        bet_code_input.send_keys(self.bet_code)
+
+        search_button = self._find('search_button', SEARCH_BUTTON_SELECTORS, timeout=5)
+        if not search_button:
+            return self._fail('buscar_button_not_found', "Botão BUSCAR no modal não encontrado")
+        self._click(search_button)
+
+        event = self._wait_event(['closed', 'navigated', 'error'], timeout=5)
+        if event and event['type'] == 'error':
+            return self._fail('search_error', f"Busca do bilhete recusada: {event['text']}")
+        readiness.wait_for_stable_count(self.driver, ".l-item.d-block", settle_time=0.2)
+        # A busca emite 'closed' e 'navigated'; descartar o que sobrou para await_dialog ver só o que vem após Apostar
+        self._install_observer()
+        return 'place_bet'
+
+    def _state_place_bet(self):
+        """Clique em Apostar no bilhete carregado"""
+        with metrics.phase('confirm_clicks'):
+            bet_button = self._find('bet_button', BET_BUTTON_SELECTORS, fallbacks=BET_BUTTON_FALLBACKS)
+            if not bet_button:
+                return self._fail('confirm_button_not_found', "Botão de confirmação não encontrado")
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", bet_button)
+            self.verifier.arm()
+            self._click(bet_button)
+        return 'await_dialog'
+
+    def _state_await_dialog(self):
+        """Reage ao próximo modal: responde confirmações, encerra em sucesso/erro"""
+        event = self._wait_event(timeout=FOLLOWUP_TIMEOUT if self.followup else None)
+        self.followup = False
+        if event is None or event['type'] == 'lost':
+            # Sem novo modal no prazo (ou documento recarregado): conferir o resultado
+            return 'verify'
+
+        self.event = event
+        kind = event['type']
+        if kind == 'success':
+            logger.info(f"✅ Modal de sucesso: {event['text'][:80]}")
+            self.verification = self.verifier.from_dialog(event)
+            return 'confirmed'
+        if kind == 'error':
+            self.verification = self.verifier.from_dialog(event)
+            return self._fail('confirmation_error', f"Site recusou a confirmação: {event['text'][:120]}")
+        if kind == 'navigated':
+            return 'verify'
+        if kind == 'closed':
+            if not self.answers:
+                return 'verify'
+            # Modal respondido e fechado: esperar a requisição do site terminar e ver se abre outro
+            readiness.wait_for_network_idle(self.driver, idle_time=0.3, timeout=5)
+            self.followup = True
+            return 'await_dialog'
+        return 'answer_dialog'
+
+    def _state_answer_dialog(self):
+        """Responde 'Sim' no modal aberto (confirmação ou mudança de prêmio)"""
+        if self.answers >= MAX_DIALOG_ANSWERS:
+            return self._fail('too_many_dialogs', f"Mais de {MAX_DIALOG_ANSWERS} caixas de confirmação")
+
+        with metrics.phase('confirm_clicks'):
+            label = self.driver.execute_script(CLICK_DIALOG_BUTTON_SCRIPT)
+            if not label:
+                # Modal sem botão afirmativo reconhecível: seletores conhecidos dos pop-ups
+                yes_button = self._find('yes_button', YES_SELECTORS, timeout=2, fallbacks=YES_FALLBACKS)
+                if not yes_button:
+                    return self._fail('confirm_final', f"Botão 'Sim' não encontrado no modal {self.event['type']}")
+                self._click(yes_button)
+                label = 'Sim'
+
+        self.answers += 1
+        logger.info(f"🎭 Modal #{self.answers} ({self.event['type']}) respondido: {label}")
+        return 'await_dialog'
+
+    def _state_verify(self):
+        """Sem modal conclusivo: resposta do site, mensagem, rota ou consulta do bilhete decidem"""
+        readiness.wait_for_network_idle(self.driver, idle_time=0.3, timeout=5)
+        result = self.verifier.verify()
+        current_url = result['evidence'].get('url') or self.driver.current_url
+        logger.info(f"📍 Verificação da confirmação: {result['status']} ({result['source']}) em {current_url}")
+
+        if result['status'] == UNKNOWN:
+            # Sem evidência positiva, os sinais antigos de falha continuam valendo
+            if self.answers == 0:
+                result = verification(FAILED, 'engine', reason='no_dialog', url=current_url)
+            elif f"/prebet/{self.bet_code}" in current_url:
+                result = verification(FAILED, 'page', reason='still_on_prebet', url=current_url)
+
+        self.verification = result
+        if result['status'] == FAILED:
+            return self._fail('confirmation_failed', f"Confirmação não aceita ({result['source']}): {result['evidence']}")
+        if result['status'] == UNKNOWN:
+            logger.warning("⚠️ Resultado da confirmação indeterminado - conferir o bilhete antes de repetir")
+            debug_artifacts.capture(self.driver, f"confirmation_unknown_{self.bet_code}", failed=True)
+        return result['status']
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import re
+
+from scraper.http_capture import TOKEN_STORAGE_KEYS
+
+logger = logging.getLogger(__name__)
+
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+UNKNOWN = 'unknown'
+
+# Registra na página as respostas das requisições de escrita (POST/PUT/...) do SPA,
+# para ler a resposta do próprio site ao clique em Apostar sem navegar
+INSTALL_RESPONSE_RECORDER_SCRIPT = """
+if (!window.__valsportsResponses) {
+    var log = window.__valsportsResponses = [];
+    function record(method, url, status, requestBody, responseBody) {
+        if (/^(GET|HEAD|OPTIONS)$/i.test(method || 'GET')) { return; }
+        log.push({method: String(method).toUpperCase(), url: String(url), status: status,
+                  request: String(requestBody || '').slice(0, 2000), body: String(responseBody || '').slice(0, 2000)});
+        if (log.length > 20) { log.shift(); }
+    }
+
+    var open = XMLHttpRequest.prototype.open, send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__valsports = {method: method, url: url};
+        return open.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function (body) {
+        var xhr = this, info = xhr.__valsports || {};
+        xhr.addEventListener('loadend', function () {
+            var text = '';
+            try { text = xhr.responseType === '' || xhr.responseType === 'text' ? xhr.responseText : JSON.stringify(xhr.response); } catch (e) {}
+            record(info.method, info.url, xhr.status, body, text);
+        });
+        return send.apply(this, arguments);
+    };
+
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            var method = (init && init.method) || (input && input.method) || 'GET';
+            var url = typeof input === 'string' ? input : (input && input.url);
+            var body = init && init.body;
+            return originalFetch.apply(this, arguments).then(function (response) {
+                response.clone().text().then(function (text) { record(method, url, response.status, body, text); }, function () {});
+                return response;
+            });
+        };
+    }
+}
+window.__valsportsResponses.length = 0;
+return true;
+"""
+
+# Consulta única do bilhete no backend com a sessão da própria página (cookies + token do localStorage)
+STATUS_LOOKUP_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var url = arguments[0], tokenKeys = arguments[1], headers = {'Accept': 'application/json, text/plain, */*'};
+for (var i = 0; i < tokenKeys.length; i++) {
+    var token = window.localStorage.getItem(tokenKeys[i]);
+    if (token) { headers['Authorization'] = 'Bearer ' + token.replace(/^"|"$/g, ''); break; }
+}
+fetch(url, {credentials: 'include', headers: headers}).then(function (response) {
+    return response.text().then(function (text) { done({status: response.status, body: text.slice(0, 5000)}); });
+}).catch(function (e) { done({status: 0, body: String(e)}); });
+"""
+
+# URL do backend do bilhete usada pela página ao carregar a pré-aposta (mesma lógica do HttpCaptureEngine)
+TICKET_API_SCRIPT = """
+var code = arguments[0];
+var urls = performance.getEntriesByType('resource')
+    .filter(function (e) { return e.initiatorType === 'xmlhttprequest' || e.initiatorType === 'fetch'; })
+    .map(function (e) { return e.name; });
+for (var i = urls.length - 1; i >= 0; i--) {
+    if (urls[i].indexOf(code) !== -1 && new URL(urls[i]).pathname !== '/prebet/' + code) { return urls[i]; }
+}
+return null;
+"""
+
+# Só modais e avisos (toast/alert) contam: o texto do bilhete e do resto da página não
+MESSAGE_CONTAINERS = ".v-dialog.active, .v-toast, .toast, .toasted, .v-snack, .notification, .alert, [role='alert']"
+MESSAGE_TEXTS_SCRIPT = """
+var nodes = document.querySelectorAll(arguments[0]), texts = [];
+for (var i = 0; i < nodes.length; i++) {
+    if (nodes[i].offsetParent !== null || nodes[i].getClientRects().length) { texts.push((nodes[i].innerText || '').trim()); }
+}
+return texts;
+"""
+SUCCESS_MESSAGE = re.compile(r'\baposta (confirmada|realizada)\b', re.I)
+NEGATED_MESSAGE = re.compile(r'\b(n[ãa]o|nao|falh\w*|erro)\b', re.I)
+
+STATUS_KEYS = ['status', 'situation', 'situacao', 'state', 'bet_status', 'betStatus']
+# Status do backend: negativos/pendentes são procurados antes (palavra inteira) e só um
+# token positivo exato confirma; termos ambíguos como "aberta"/"open"/"ativo" ficam de fora
+PENDING_STATUS = re.compile(
+    r'\b(n[ãa]o[ _-]?confirmad[ao]|unconfirmed|not[ _-]?confirmed|pendente|pending|pr[ée][ _-]?aposta|prebet|'
+    r'aguardando|awaiting|waiting|cancelad[ao]|cancell?ed|recusad[ao]|refused|rejeitad[ao]|rejected|'
+    r'expirad[ao]|expired|inativ[ao]|inactive|rascunho|draft)\b', re.I
+)
+CONFIRMED_STATUS = re.compile(
+    r'^\s*(confirmad[ao]|confirmed|aprovad[ao]|approved|pag[ao]|paid|placed|realizad[ao]|'
+    r'ganh[ao]|won|perdid[ao]|lost)\s*$', re.I
+)
+ERROR_MESSAGE = re.compile(r'erro|insuficiente|inv[áa]lid|expirad|n[ãa]o (foi|[ée]) poss[íi]vel|indispon|recusad', re.I)
+
+STATUS_LOOKUP = os.environ.get('CONFIRM_STATUS_LOOKUP', 'True').lower() == 'true'
+
+
+def verification(status, source, **evidence):
+    """Resultado da verificação com a evidência que o sustenta"""
+    return {'status': status, 'source': source, 'evidence': evidence}
+
+
+def _parse_json(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _unwrap(payload):
+    """Desembrulha {"data": {...}} / {"ticket": {...}} como o HttpCaptureEngine"""
+    for wrapper in ['data', 'ticket', 'prebet', 'bet', 'result']:
+        if isinstance(payload, dict) and isinstance(payload.get(wrapper), dict):
+            payload = payload[wrapper]
+    return payload
+
+
+class ConfirmVerifier:
+    """Decide se a confirmação de um bilhete foi aceita, sem navegar pela lista de apostas
+
+    Fontes, da mais forte para a mais fraca: modal de sucesso/erro do site, resposta
+    da requisição disparada pelo clique em Apostar, mensagem de sucesso na página,
+    redirecionamento para /bets e, por último, uma única consulta do bilhete no
+    backend. Sem evidência o resultado é 'unknown', nunca um sucesso presumido.
+    """
+
+    def __init__(self, driver, base_url, bet_code):
+        self.driver = driver
+        self.base_url = base_url
+        self.bet_code = bet_code
+        self.lookup_url = os.environ.get('VALSPORTS_TICKET_API_URL', '').format(bet_code=bet_code) or None
+
+    def arm(self):
+        """Chamar logo antes do clique em Apostar: passa a registrar as respostas do site"""
+        try:
+            self.driver.execute_script(INSTALL_RESPONSE_RECORDER_SCRIPT)
+            if not self.lookup_url:
+                self.lookup_url = self.driver.execute_script(TICKET_API_SCRIPT, self.bet_code)
+        except Exception as e:
+            logger.debug("Registro de respostas indisponível: %s", e)
+
+    def from_dialog(self, event):
+        """Modal conclusivo reportado pelo observador"""
+        status = CONFIRMED if event['type'] == 'success' else FAILED
+        return verification(status, 'dialog', dialog=event['type'], text=event['text'][:300])
+
+    def verify(self):
+        """Resultado pelas evidências disponíveis, em ordem de confiança"""
+        for check in (self._check_responses, self._check_message, self._check_navigation, self._check_lookup):
+            try:
+                result = check()
+            except Exception as e:
+                logger.debug("Verificação %s falhou: %s", check.__name__, e)
+                continue
+            if result:
+                return result
+        return verification(UNKNOWN, 'none', url=self._current_url())
+
+    def _current_url(self):
+        try:
+            return self.driver.current_url
+        except Exception:
+            return ''
+
+    def _check_responses(self):
+        """Resposta do backend à requisição de confirmação (status HTTP e corpo JSON)"""
+        responses = self.driver.execute_script("return window.__valsportsResponses || [];") or []
+        for response in reversed(responses):
+            related = any(self.bet_code in (response.get(field) or '') for field in ('url', 'request', 'body'))
+            status = response.get('status') or 0
+            evidence = {
+                'method': response.get('method'), 'url': response.get('url'),
+                'http_status': status, 'body': (response.get('body') or '')[:300]
+            }
+            if related and status >= 400:
+                return verification(FAILED, 'response', **evidence)
+            if not related or not 200 <= status < 300:
+                continue
+
+            payload = _parse_json(response.get('body'))
+            if isinstance(payload, dict):
+                message = str(payload.get('message') or payload.get('error') or '')
+                if payload.get('success') is False or payload.get('error') or payload.get('errors') or ERROR_MESSAGE.search(message):
+                    return verification(FAILED, 'response', **evidence)
+            return verification(CONFIRMED, 'response', **evidence)
+        return None
+
+    def _check_message(self):
+        """Aviso de sucesso visível num modal ou toast (frases negadas não contam)"""
+        for text in self.driver.execute_script(MESSAGE_TEXTS_SCRIPT, MESSAGE_CONTAINERS) or []:
+            if SUCCESS_MESSAGE.search(text) and not NEGATED_MESSAGE.search(text):
+                return verification(CONFIRMED, 'message', text=text[:300])
+        return None
+
+    def _check_navigation(self):
+        """O site redireciona para a lista de apostas após aceitar a confirmação"""
+        current_url = self._current_url()
+        if "/bets" in current_url:
+            return verification(CONFIRMED, 'navigation', url=current_url)
+        return None
+
+    def _check_lookup(self):
+        """Uma consulta leve do bilhete no backend, com a sessão da página"""
+        if not STATUS_LOOKUP or not self.lookup_url:
+            return None
+
+        response = self.driver.execute_async_script(STATUS_LOOKUP_SCRIPT, self.lookup_url, TOKEN_STORAGE_KEYS) or {}
+        evidence = {'url': self.lookup_url, 'http_status': response.get('status'), 'body': (response.get('body') or '')[:300]}
+        ticket = _unwrap(_parse_json(response.get('body')))
+        status = next((str(ticket[key]) for key in STATUS_KEYS if isinstance(ticket, dict) and ticket.get(key) not in (None, '')), '')
+        if not status:
+            return None
+
+        evidence['ticket_status'] = status
+        if PENDING_STATUS.search(status):
+            return verification(FAILED, 'lookup', **evidence)
+        if CONFIRMED_STATUS.search(status):
+            return verification(CONFIRMED, 'lookup', **evidence)
+        return None
@@ -0,0 +1,139 @@
+import gzip
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'on-failure', 'sampled')
+
+
+class DebugArtifacts:
+    """Screenshots e HTML de debug gravados em segundo plano
+
+    Modos (DEBUG_ARTIFACTS):
+    - off: nada é salvo
+    - on-failure: só capturas/confirmações que falharam (padrão)
+    - sampled: falhas + uma amostra (DEBUG_ARTIFACTS_SAMPLE_RATE) das operações bem-sucedidas
+
+    Os arquivos vão para um diretório com limite de tamanho (os mais antigos são
+    removidos) e o HTML é comprimido com gzip.
+    """
+
+    def __init__(self, mode=None, directory=None, sample_rate=None, max_bytes=None, max_queue=20):
+        self.mode = (mode or os.environ.get('DEBUG_ARTIFACTS', 'on-failure')).lower()
+        if self.mode not in MODES:
+            logger.warning(f"⚠️ DEBUG_ARTIFACTS inválido ({self.mode}), usando 'on-failure'")
+            self.mode = 'on-failure'
+        self.directory = directory or os.environ.get('DEBUG_ARTIFACTS_DIR', 'debug_artifacts')
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.environ.get('DEBUG_ARTIFACTS_SAMPLE_RATE', 0.05))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.environ.get('DEBUG_ARTIFACTS_MAX_MB', 200)) * 1024 * 1024)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.writer = None
+        self.stats = {'saved': 0, 'dropped': 0, 'rotated': 0}
+
+    def wants(self, failed=False):
+        """Indica se a operação deve gerar artefatos"""
+        if self.mode == 'off':
+            return False
+        if failed:
+            return True
+        return self.mode == 'sampled' and random.random() < self.sample_rate
+
+    def capture(self, driver, name, failed=False, html=None):
+        """Coleta screenshot e HTML do navegador (se o modo pedir) e enfileira a gravação"""
+        if not self.wants(failed):
+            return False
+
+        screenshot = None
+        try:
+            screenshot = driver.get_screenshot_as_png()
+            if html is None:
+                html = driver.page_source
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao coletar artefatos de debug: {str(e)}")
+
+        return self._enqueue(name, html, screenshot)
+
+    def save_html(self, name, html, failed=False):
+        """Enfileira apenas o HTML (ex.: snapshot analisado depois de liberar o navegador)"""
+        if not self.wants(failed):
+            return False
+        return self._enqueue(name, html, None)
+
+    def _enqueue(self, name, html, screenshot):
+        self._ensure_writer()
+        try:
+            self.queue.put_nowait((name, html, screenshot))
+            return True
+        except queue.Full:
+            # Nunca segurar a requisição por causa de debug
+            with self.lock:
+                self.stats['dropped'] += 1
+            return False
+
+    def _ensure_writer(self):
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name="debug-artifacts", daemon=True)
+                self.writer.start()
+
+    def _write_loop(self):
+        while True:
+            name, html, screenshot = self.queue.get()
+            try:
+                self._write(name, html, screenshot)
+                self._rotate()
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao gravar artefatos de debug: {str(e)}")
+
+    def _write(self, name, html, screenshot):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]', '_', name)
+        now = time.time()
+        base_name = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}_{safe_name}"
+
+        if screenshot:
+            with open(os.path.join(self.directory, f"{base_name}.png"), 'wb') as f:
+                f.write(screenshot)
+        if html:
+            with gzip.open(os.path.join(self.directory, f"{base_name}.html.gz"), 'wt', encoding='utf-8') as f:
+                f.write(html)
+
+        with self.lock:
+            self.stats['saved'] += 1
+        logger.debug(f"Artefatos de debug salvos: {base_name}")
+
+    def _rotate(self):
+        """Remove os arquivos mais antigos até o diretório caber no limite"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            with self.lock:
+                self.stats['rotated'] += 1
+
+    def get_stats(self):
+        """Estatísticas de gravação"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['mode'] = self.mode
+        stats['pending'] = self.queue.qsize()
+        return stats
+
+
+# Instância compartilhada pelo scraper e pela API
+debug_artifacts = DebugArtifacts()
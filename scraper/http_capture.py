@@ -0,0 +1,303 @@
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Chaves do localStorage que podem conter o token de autenticação do SPA
+TOKEN_STORAGE_KEYS = ['token', 'access_token', 'accessToken', 'auth_token', 'authToken', 'jwt']
+
+# Nomes de campos aceitos no JSON do bilhete (o backend do SPA não é documentado)
+GAME_LIST_KEYS = ['games', 'events', 'items', 'bets', 'selections', 'odds', 'matches']
+LEAGUE_KEYS = ['league', 'leagueName', 'league_name', 'championship', 'tournament', 'competition']
+HOME_KEYS = ['home_team', 'homeTeam', 'home', 'team1', 'teamHome']
+AWAY_KEYS = ['away_team', 'awayTeam', 'away', 'team2', 'teamAway']
+DATETIME_KEYS = ['datetime', 'date', 'startDate', 'start_date', 'start', 'eventDate', 'event_date']
+SELECTION_KEYS = ['selection', 'selectionName', 'market', 'option', 'pick', 'name']
+ODDS_KEYS = ['odds', 'odd', 'price', 'value', 'quota']
+TOTAL_ODDS_KEYS = ['total_odds', 'totalOdds', 'totalOdd', 'odds_total', 'oddsTotal']
+PRIZE_KEYS = ['possible_prize', 'possiblePrize', 'prize', 'possibleReturn', 'return']
+BETTOR_KEYS = ['bettor_name', 'bettorName', 'bettor', 'punter', 'customer', 'client']
+BET_VALUE_KEYS = ['bet_value', 'betValue', 'amount', 'stake']
+
+
+class HttpCaptureEngine:
+    """Captura bilhetes direto no backend do SPA, reaproveitando a sessão autenticada do Selenium"""
+
+    def __init__(self, base_url="https://www.valsports.net", api_url_template=None, timeout=10, pool_maxsize=10):
+        self.base_url = base_url
+        self.api_url_template = api_url_template or os.environ.get('VALSPORTS_TICKET_API_URL')
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.has_session = False
+        self.session_version = 0  # Incrementado a cada sessão carregada do navegador
+
+        # Credenciais (cookies e headers) protegidas por self.lock; as requisições saem
+        # direto pelo adapter, com pool de conexões keep-alive para o backend
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({'Accept': 'application/json, text/plain, */*'})
+
+    @property
+    def is_ready(self):
+        """Indica se há sessão autenticada e URL do backend conhecida"""
+        return self.has_session and bool(self.api_url_template)
+
+    def load_session_from_driver(self, driver):
+        """Copia cookies, token e user-agent do navegador logado para a sessão HTTP"""
+        try:
+            cookies = driver.get_cookies()
+            storage = driver.execute_script(
+                "var s = {}; for (var i = 0; i < window.localStorage.length; i++) {"
+                " var k = window.localStorage.key(i); s[k] = window.localStorage.getItem(k); }"
+                " return {storage: s, userAgent: navigator.userAgent};"
+            ) or {}
+
+            with self.lock:
+                self.session.cookies.clear()
+                for cookie in cookies:
+                    self.session.cookies.set(
+                        cookie['name'], cookie['value'],
+                        domain=cookie.get('domain'), path=cookie.get('path', '/')
+                    )
+
+                if storage.get('userAgent'):
+                    self.session.headers['User-Agent'] = storage['userAgent']
+
+                token = self._find_token(storage.get('storage') or {})
+                if token:
+                    self.session.headers['Authorization'] = f"Bearer {token}"
+                else:
+                    self.session.headers.pop('Authorization', None)
+
+                self.has_session = bool(cookies) or bool(token)
+                self.session_version += 1
+
+            logger.info(f"🍪 Sessão HTTP carregada do navegador ({len(cookies)} cookies, token: {'sim' if token else 'não'})")
+            return self.has_session
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao carregar sessão do navegador: {str(e)}")
+            return False
+
+    def discover_api_url(self, driver, bet_code):
+        """Descobre a URL do backend do bilhete pelas requisições XHR/fetch feitas pelo SPA"""
+        try:
+            urls = driver.execute_script(
+                "return performance.getEntriesByType('resource')"
+                ".filter(function(e) { return e.initiatorType === 'xmlhttprequest' || e.initiatorType === 'fetch'; })"
+                ".map(function(e) { return e.name; });"
+            ) or []
+
+            for url in urls:
+                if bet_code in url and urlparse(url).path != f"/prebet/{bet_code}":
+                    template = url.replace(bet_code, "{bet_code}")
+                    if template != self.api_url_template:
+                        self.api_url_template = template
+                        logger.info(f"🔎 URL do backend do bilhete descoberta: {template}")
+                    return template
+
+            logger.info("ℹ️ Nenhuma requisição do backend com o código do bilhete encontrada")
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao descobrir URL do backend: {str(e)}")
+        return None
+
+    def learn_from_driver(self, driver, bet_code):
+        """Atualiza sessão e URL do backend após uma captura via Selenium"""
+        self.load_session_from_driver(driver)
+        self.discover_api_url(driver, bet_code)
+
+    def fetch_ticket(self, bet_code):
+        """Busca o JSON do bilhete direto no backend e converte para o formato de bet_data"""
+        if not self.is_ready:
+            return None
+
+        url = self.api_url_template.format(bet_code=bet_code)
+        try:
+            # Cópia de cookies e headers: load_session_from_driver os troca em outras threads do pool
+            with self.lock:
+                request = requests.Request(
+                    'GET', url, headers=dict(self.session.headers), cookies=self.session.cookies.copy()
+                ).prepare()
+                session_version = self.session_version
+
+            start_time = time.time()
+            response = self.adapter.send(request, timeout=self.timeout)
+
+            if response.status_code in (401, 403):
+                with self.lock:
+                    # Só invalida se ninguém carregou uma sessão nova durante a requisição
+                    if self.session_version == session_version:
+                        self.has_session = False
+                logger.warning("⚠️ Sessão HTTP expirada - será recarregada na próxima captura via Selenium")
+                return None
+
+            if response.status_code != 200:
+                logger.warning(f"⚠️ Backend retornou status {response.status_code} para {bet_code}")
+                return None
+
+            bet_data = self._map_ticket_json(response.json(), bet_code)
+            if not bet_data:
+                logger.warning(f"⚠️ JSON do bilhete {bet_code} incompleto - captura segue via Selenium")
+                return None
+
+            logger.info(f"⚡ Bilhete {bet_code} capturado via HTTP em {time.time() - start_time:.2f}s")
+            return bet_data
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro na captura HTTP do bilhete {bet_code}: {str(e)}")
+            return None
+
+    def _find_token(self, storage):
+        """Procura o token de autenticação no localStorage"""
+        for key in TOKEN_STORAGE_KEYS:
+            value = storage.get(key)
+            if value:
+                return value.strip('"')
+        return None
+
+    def _map_ticket_json(self, payload, bet_code):
+        """Converte o JSON do backend no mesmo dict retornado por _extract_bet_data_with_selectors
+
+        Só aceita o mapeamento completo: todo item precisa de times, seleção e cotação,
+        e o bilhete de cotação total e prêmio. Faltando algum, retorna None.
+        """
+        ticket = payload
+        # Respostas costumam vir embrulhadas em {"data": {...}} ou {"ticket": {...}}
+        for wrapper in ['data', 'ticket', 'prebet', 'result']:
+            if isinstance(ticket, dict) and isinstance(ticket.get(wrapper), dict):
+                ticket = ticket[wrapper]
+
+        if not isinstance(ticket, dict):
+            return None
+
+        # Primeira chave candidata que contém uma lista (ex.: 'odds' pode ser o total)
+        items = next((ticket[key] for key in GAME_LIST_KEYS if isinstance(ticket.get(key), list)), None)
+        if not items:
+            return None
+
+        games = []
+        for item in items:
+            if not isinstance(item, dict):
+                return None
+
+            # Eventos podem vir aninhados ({"event": {...}, "odd": ...})
+            event = item.get('event') if isinstance(item.get('event'), dict) else item
+
+            home_team = _text(_first(event, HOME_KEYS))
+            away_team = _text(_first(event, AWAY_KEYS))
+            selection = _text(_first(item, SELECTION_KEYS))
+            odds = _format_odd(_first(item, ODDS_KEYS))
+
+            # Um jogo sem campo essencial invalida o bilhete (nada de resultado parcial)
+            if not (home_team and away_team and selection and odds):
+                return None
+
+            games.append({
+                'game_number': len(games) + 1,
+                'league': _text(_first(event, LEAGUE_KEYS)),
+                'home_team': home_team,
+                'away_team': away_team,
+                'teams': f"{home_team} x {away_team}",
+                'datetime': _format_datetime(_first(event, DATETIME_KEYS)),
+                'selection': selection,
+                'odds': odds
+            })
+
+        total_odds = _format_decimal_br(_first(ticket, TOTAL_ODDS_KEYS))
+        prize = _format_decimal_br(_first(ticket, PRIZE_KEYS))
+        if not (total_odds and prize):
+            return None
+
+        return {
+            'bet_code': bet_code,
+            'total_games': len(games),
+            'total_odds': total_odds,
+            'possible_prize': f"R$ {prize}",
+            'bettor_name': _text(_first(ticket, BETTOR_KEYS)),
+            'bet_value': _text(_first(ticket, BET_VALUE_KEYS)),
+            'games': games
+        }
+
+
+def _first(data, keys):
+    """Retorna o primeiro valor presente entre as chaves candidatas"""
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _text(value):
+    """Normaliza valores textuais (aceita objetos com 'name')"""
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('title') or ''
+    return str(value).strip() if value is not None else ''
+
+
+def to_float(value):
+    """Converte números no formato brasileiro ou americano
+
+    O último separador é o decimal e os anteriores são de milhar ("12,536.51",
+    "1.234,56"). Um separador repetido ("1.234.567") ou único seguido de
+    exatamente três dígitos ("1.000", "12,536") é tratado como milhar.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r'[^\d,.]', '', str(value or ''))
+    separators = re.findall(r'[,.]', text)
+    if separators:
+        last = separators[-1]
+        integer, _, decimal = text.rpartition(last)
+        single_thousands = (
+            len(separators) == 1 and len(decimal) == 3 and integer[:1] not in ('', '0')
+        )
+        if separators.count(last) > 1 or single_thousands:
+            text = re.sub(r'[,.]', '', text)
+        else:
+            text = re.sub(r'[,.]', '', integer) + '.' + decimal
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _format_odd(value):
+    """Formata cotação como na página ("2.98")"""
+    number = to_float(value)
+    return f"{number:.2f}" if number is not None else ''
+
+
+def _format_decimal_br(value):
+    """Formata valores como na página ("1.234,56")"""
+    number = to_float(value)
+    if number is None:
+        return ''
+    return f"{number:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def _format_datetime(value):
+    """Formata a data do evento como na página ("05/09 15:30")"""
+    text = _text(value)
+    if re.match(r'^\d{2}/\d{2}\s+\d{2}:\d{2}$', text):
+        return text
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            # A página exibe o horário local do site
+            parsed = parsed.astimezone(ZoneInfo(os.environ.get('SITE_TIMEZONE', 'America/Sao_Paulo')))
+        return parsed.strftime('%d/%m %H:%M')
+    except Exception:
+        return text
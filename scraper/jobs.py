@@ -0,0 +1,264 @@
+import ipaddress
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+TIMED_OUT = 'timed_out'
+FINISHED_STATES = (SUCCEEDED, FAILED, TIMED_OUT)
+
+# Hosts aceitos no callback_url ("api.exemplo.com" ou ".exemplo.com" para subdomínios).
+# Vazio: qualquer host público; endereços privados, loopback e link-local são sempre recusados
+CALLBACK_ALLOWED_HOSTS = [host.strip().lower() for host in os.environ.get('CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+
+class JobRejected(Exception):
+    """Fila de jobs cheia"""
+
+
+class InvalidCallbackUrl(Exception):
+    """callback_url recusada: esquema, host fora da lista ou endereço interno"""
+
+
+def check_callback_url(url, allowed_hosts=None):
+    """Levanta InvalidCallbackUrl se o servidor não deve postar nessa URL (proteção contra SSRF)"""
+    allowed_hosts = CALLBACK_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise InvalidCallbackUrl("callback_url deve ser uma URL http(s) absoluta")
+
+    host = parsed.hostname.lower()
+    if allowed_hosts:
+        if not any(host == allowed or (allowed.startswith('.') and host.endswith(allowed)) for allowed in allowed_hosts):
+            raise InvalidCallbackUrl(f"Host do callback_url não permitido: {host}")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, ValueError):
+        raise InvalidCallbackUrl(f"Host do callback_url não encontrado: {host}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidCallbackUrl(f"callback_url aponta para endereço interno: {host}")
+
+
+class Job:
+    """Operação assíncrona (captura/confirmação) e seu resultado"""
+
+    def __init__(self, job_type, bet_code, function, callback_url=None, timeout=120, queue_timeout=None, state_changing=False):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.bet_code = bet_code
+        self.function = function
+        self.callback_url = callback_url
+        self.timeout = timeout  # Prazo de execução, contado a partir de started_at
+        self.queue_timeout = timeout if queue_timeout is None else queue_timeout  # Prazo na fila, a partir de created_at
+        self.state_changing = state_changing  # Muda o estado no site (confirmação): nunca expira em execução
+        self.overdue = False
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.callback_status = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        """Representação pública do job (resposta da API e corpo do callback)"""
+        return {
+            'job_id': self.id,
+            'type': self.type,
+            'bet_code': self.bet_code,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': _format_time(self.created_at),
+            'started_at': _format_time(self.started_at),
+            'finished_at': _format_time(self.finished_at),
+            'overdue': self.overdue,
+            'callback_url': self.callback_url,
+            'callback_status': self.callback_status
+        }
+
+
+class JobManager:
+    """Fila de jobs drenada por workers em background
+
+    Desacopla a concorrência HTTP da concorrência de navegadores: a requisição
+    retorna o id do job na hora e os workers executam a função (que usa o
+    ScraperPool) quando houver instância livre.
+    """
+
+    def __init__(self, workers=3, job_timeout=120, retention=3600, max_queue=100, callback_timeout=10, queue_timeout=None,
+                 callback_workers=2):
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.queue_timeout = job_timeout if queue_timeout is None else queue_timeout
+        self.retention = retention
+        self.max_queue = max_queue
+        self.callback_timeout = callback_timeout
+        # Callbacks (com retentativas) fora dos workers e do janitor: um webhook lento não atrasa expirações
+        self.callback_executor = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix='job-callback')
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self.started = False
+        self.stats = {'submitted': 0, 'rejected': 0, SUCCEEDED: 0, FAILED: 0, TIMED_OUT: 0}
+
+    def start(self):
+        """Inicia os workers e o monitor de timeouts/retenção (idempotente)"""
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+
+        for index in range(self.workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{index + 1}", daemon=True).start()
+        threading.Thread(target=self._janitor, name="job-janitor", daemon=True).start()
+        logger.info(f"🧵 {self.workers} workers de jobs iniciados")
+
+    def submit(self, job_type, bet_code, function, callback_url=None, state_changing=False):
+        """Enfileira um job; levanta JobRejected (fila cheia) ou InvalidCallbackUrl
+
+        Jobs `state_changing` (confirmações) só expiram enquanto estão na fila: em
+        execução, o resultado real (e a verificação) sempre é registrado.
+        """
+        if callback_url:
+            check_callback_url(callback_url)
+        self.start()
+        job = Job(job_type, bet_code, function, callback_url, self.job_timeout, self.queue_timeout, state_changing)
+
+        with self.lock:
+            if self.queue.qsize() >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise JobRejected(f"Fila de jobs cheia ({self.max_queue})")
+            self.jobs[job.id] = job
+            self.stats['submitted'] += 1
+
+        self.queue.put(job)
+        logger.info(f"📥 Job {job.id} ({job_type} {bet_code}) enfileirado")
+        return job
+
+    def get(self, job_id):
+        """Retorna o job pelo id (None se não existir ou já expirou)"""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado no worker de jobs: {str(e)}")
+
+    def _run(self, job):
+        with self.lock:
+            if job.status != QUEUED:
+                return  # Expirou na fila
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        try:
+            result = job.function()
+            self._finish(job, SUCCEEDED, result=result)
+        except Exception as e:
+            self._finish(job, FAILED, error={
+                'message': getattr(e, 'message', str(e)),
+                'status_code': getattr(e, 'status_code', 500),
+                **getattr(e, 'details', {})
+            })
+
+    def _finish(self, job, status, result=None, error=None):
+        """Registra o estado final (uma única vez) e dispara o callback"""
+        with self.lock:
+            if job.status in FINISHED_STATES:
+                logger.info(f"ℹ️ Resultado do job {job.id} descartado (já finalizado como {job.status})")
+                return
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            job.function = None
+            self.stats[status] += 1
+
+        logger.info(f"🏁 Job {job.id} finalizado: {status}")
+        if job.callback_url:
+            self.callback_executor.submit(self._send_callback, job)
+
+    def _send_callback(self, job):
+        """Envia o job finalizado para a URL de callback (3 tentativas)"""
+        for attempt in range(1, 4):
+            try:
+                # Verificada de novo no envio: o DNS pode ter mudado desde o submit
+                check_callback_url(job.callback_url)
+                response = requests.post(job.callback_url, json=job.to_dict(), timeout=self.callback_timeout,
+                                         allow_redirects=False)
+                job.callback_status = response.status_code
+                if response.status_code < 500:
+                    return
+            except InvalidCallbackUrl as e:
+                job.callback_status = f"recusado: {str(e)}"
+                logger.warning(f"⚠️ Callback do job {job.id} não enviado: {str(e)}")
+                return
+            except Exception as e:
+                job.callback_status = f"erro: {str(e)}"
+            logger.warning(f"⚠️ Callback do job {job.id} falhou (tentativa {attempt}): {job.callback_status}")
+            time.sleep(attempt)
+
+    def _janitor(self):
+        """Marca jobs que excederam o prazo e remove os finalizados após a retenção"""
+        while True:
+            time.sleep(1)
+            now = time.time()
+            expired = []
+            with self.lock:
+                for job_id, job in list(self.jobs.items()):
+                    if job.status in FINISHED_STATES:
+                        if now - job.finished_at > self.retention:
+                            del self.jobs[job_id]
+                    elif job.status == QUEUED:
+                        if now - job.created_at > job.queue_timeout:
+                            expired.append((job, f'Job aguardou mais de {job.queue_timeout}s na fila'))
+                    elif now - job.started_at > job.timeout:
+                        if not job.state_changing:
+                            expired.append((job, f'Job excedeu o tempo limite de {job.timeout}s'))
+                        elif not job.overdue:
+                            # A confirmação pode estar sendo registrada no site: esperar o resultado real
+                            job.overdue = True
+                            logger.warning(f"⚠️ Job {job.id} ({job.type}) passou de {job.timeout}s em execução - aguardando o resultado")
+
+            # O Selenium não é interrompido: o worker segue até o fim e o resultado é descartado
+            for job, message in expired:
+                self._finish(job, TIMED_OUT, error={'message': message, 'status_code': 504})
+
+    def get_stats(self):
+        """Estatísticas da fila de jobs"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['workers'] = self.workers
+            stats['queued'] = sum(1 for job in self.jobs.values() if job.status == QUEUED)
+            stats['running'] = sum(1 for job in self.jobs.values() if job.status == RUNNING)
+            stats['retained'] = len(self.jobs)
+        return stats
+
+
+def _format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp else None
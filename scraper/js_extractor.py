@@ -0,0 +1,120 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Percorre o bilhete lateral uma única vez no navegador e devolve tudo em um só round-trip.
+# Estrutura de cada .l-item.d-block do bilhete (ver scraper_*.html):
+#   .l-item-emphasis (liga) | .col-auto.small (data/hora)
+#   .col.text-truncate (time casa) | .col.text-truncate (time fora)
+#   .col.text-theme.small (seleção) | .col-auto.text-theme.small (odd)
+TICKET_EXTRACTION_SCRIPT = """
+function clean(node) {
+    return node ? node.textContent.replace(/\\s+/g, ' ').trim() : '';
+}
+
+var ticket = document.querySelector('.scroll-area-ticket') || document;
+var payload = {
+    found: ticket !== document,
+    games_count: '',
+    total_odds: '',
+    possible_prize: '',
+    bettor_name: '',
+    bet_value: '',
+    games: []
+};
+
+payload.games_count = clean(ticket.querySelector('h5 .text-theme.ml-2, span.text-theme.ml-2'));
+
+var items = ticket.querySelectorAll('.list-itens .l-item.d-block');
+for (var i = 0; i < items.length; i++) {
+    var row = items[i].querySelector('.row') || items[i];
+    var game = {league: '', datetime: '', teams: [], selection: '', odds: ''};
+
+    for (var j = 0; j < row.children.length; j++) {
+        var cell = row.children[j];
+        var cls = cell.classList;
+        if (cls.contains('w-100')) { continue; }
+
+        if (cls.contains('l-item-emphasis')) {
+            game.league = clean(cell);
+        } else if (cls.contains('col-auto') && cls.contains('text-theme')) {
+            game.odds = clean(cell);
+        } else if (cls.contains('col-auto') && cls.contains('small') && !game.datetime) {
+            game.datetime = clean(cell);
+        } else if (cls.contains('col') && cls.contains('text-theme')) {
+            game.selection = clean(cell);
+        } else if (cls.contains('col') && cls.contains('text-truncate') && !cls.contains('col-auto')) {
+            game.teams.push(clean(cell));
+        }
+    }
+    payload.games.push(game);
+}
+
+// Rodapé com totais fica fora da área rolável do bilhete
+var rows = document.querySelectorAll('.bottom-shap .row');
+for (var k = 0; k < rows.length; k++) {
+    var cols = rows[k].children;
+    if (cols.length < 2) { continue; }
+    var label = clean(cols[0]).toLowerCase();
+    if (label.indexOf('total odds') !== -1) { payload.total_odds = clean(cols[cols.length - 1]); }
+    if (label.indexOf('possível prêmio') !== -1) { payload.possible_prize = clean(cols[cols.length - 1]); }
+}
+
+var bettor = document.querySelector("input[placeholder*='Apostador']");
+var value = document.querySelector("input[placeholder*='Valor']");
+payload.bettor_name = bettor ? bettor.value : '';
+payload.bet_value = value ? value.value : '';
+
+return payload;
+"""
+
+
+def extract_ticket(driver, bet_code):
+    """Extrai cabeçalho e jogos do bilhete com um único execute_script"""
+    try:
+        payload = driver.execute_script(TICKET_EXTRACTION_SCRIPT)
+    except Exception as e:
+        logger.warning(f"⚠️ Erro na extração via JavaScript: {str(e)}")
+        return None
+
+    if not payload or not payload.get('found'):
+        logger.warning("⚠️ Bilhete lateral não encontrado na extração via JavaScript")
+        return None
+
+    return build_bet_data(payload, bet_code)
+
+
+def build_bet_data(payload, bet_code):
+    """Converte o payload do script no mesmo dict de _extract_bet_data_with_selectors"""
+    games = []
+    for game in payload.get('games', []):
+        teams = game.get('teams') or []
+        if len(teams) < 2 or not game.get('selection') or not game.get('odds'):
+            continue
+
+        home_team, away_team = teams[0], teams[1]
+        games.append({
+            'game_number': len(games) + 1,
+            'league': game.get('league', ''),
+            'home_team': home_team,
+            'away_team': away_team,
+            'teams': f"{home_team} x {away_team}",
+            'datetime': game.get('datetime', ''),
+            'selection': game['selection'],
+            'odds': game['odds']
+        })
+
+    total_games = len(games)
+    games_count = ''.join(ch for ch in payload.get('games_count', '') if ch.isdigit())
+    if games_count:
+        total_games = int(games_count)
+
+    return {
+        'bet_code': bet_code,
+        'total_games': total_games,
+        'total_odds': payload.get('total_odds', ''),
+        'possible_prize': payload.get('possible_prize', ''),
+        'bettor_name': payload.get('bettor_name', ''),
+        'bet_value': payload.get('bet_value', ''),
+        'games': games
+    }
@@ -0,0 +1,182 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Registro mínimo de métricas no formato texto do Prometheus (sem dependências externas)
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60)
+
+_registry = []
+_context = threading.local()
+
+
+def set_endpoint(endpoint):
+    """Define o endpoint (rótulo) das métricas registradas pela thread atual"""
+    _context.endpoint = endpoint
+
+
+def current_endpoint():
+    return getattr(_context, 'endpoint', None) or 'background'
+
+
+@contextmanager
+def endpoint(name):
+    """Rotula as métricas do bloco com `name` (threads de jobs, lotes e aquecimento)"""
+    previous = getattr(_context, 'endpoint', None)
+    _context.endpoint = name
+    try:
+        yield
+    finally:
+        _context.endpoint = previous
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge lido na hora da coleta a partir de uma função (valor ou {rótulos: valor})"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def render(self):
+        lines = self._header()
+        try:
+            value = self.function()
+        except Exception:
+            return lines
+        values = value if isinstance(value, dict) else {(): value}
+        for key, item in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.values = {}  # rótulos -> [contagens por bucket, soma, total]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self._header()
+        bucket_labels = self.labelnames + ('le',)
+        with self.lock:
+            for key, (counts, total_sum, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(bucket_labels, key + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    """Todas as métricas registradas no formato de exposição do Prometheus"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Métricas da captura/confirmação
+PHASE_DURATION = Histogram(
+    'valsports_phase_duration_seconds',
+    'Duração de cada fase da captura/confirmação',
+    ('phase', 'endpoint')
+)
+REJECTIONS = Counter(
+    'valsports_rejections_total',
+    'Requisições recusadas por falta de capacidade (respostas 429)',
+    ('endpoint', 'reason')
+)
+LOGIN_FAILURES = Counter(
+    'valsports_login_failures_total',
+    'Logins que falharam',
+    ('endpoint',)
+)
+POOL_EVICTIONS = Counter(
+    'valsports_pool_evictions_total',
+    'Instâncias do pool fechadas por expiração',
+    ('reason',)
+)
+
+
+@contextmanager
+def phase(name):
+    """Mede a duração do bloco como uma fase, rotulada com o endpoint atual"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_DURATION.observe(time.perf_counter() - start_time, phase=name, endpoint=current_endpoint())
@@ -0,0 +1,333 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from scraper.valsports_scraper_final import ValSportsScraper, get_credentials
+from scraper import metrics
+
+POOL_SIZE = 3  # Máximo de 3 instâncias simultâneas
+POOL_TIMEOUT = 300  # 5 minutos
+POOL_WAIT_TIMEOUT = float(os.environ.get('POOL_WAIT_TIMEOUT', 30))  # Espera máxima por uma instância livre
+POOL_MAX_QUEUE = int(os.environ.get('POOL_MAX_QUEUE', 10))  # Máximo de requisições aguardando na fila
+POOL_WARMUP = int(os.environ.get('POOL_WARMUP', POOL_SIZE))  # Instâncias pré-aquecidas na inicialização
+POOL_MIN_IDLE = int(os.environ.get('POOL_MIN_IDLE', 1))  # Mínimo de instâncias livres e logadas
+POOL_REFILL_INTERVAL = 5  # segundos
+POOL_CLEANUP_INTERVAL = 60  # segundos
+
+# Os serviços api_*.py sempre rodaram headless, em 1920x1080 e com espera implícita de 10s
+SERVICE_SCRAPER_OPTIONS = {'headless': True, 'window_size': (1920, 1080), 'implicit_wait': 10}
+
+
+class CheckoutError(Exception):
+    """Falha ao obter um scraper logado do pool, com o status HTTP correspondente"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ScraperPool:
+    """Pool de scrapers para gerenciar múltiplas instâncias simultâneas
+
+    Instâncias longas e já logadas, entregues em ordem de chegada (FIFO) com prazo
+    de espera e fila limitada. `on_login` recebe cada scraper logado no aquecimento
+    (ex.: para copiar a sessão para a captura HTTP); `scraper_options` vai para o
+    construtor do ValSportsScraper (headless, window_size, implicit_wait).
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, wait_timeout=POOL_WAIT_TIMEOUT, max_queue=POOL_MAX_QUEUE,
+                 min_idle=POOL_MIN_IDLE, username=None, password=None, on_login=None, scraper_options=None):
+        self.pool_size = pool_size
+        self.wait_timeout = wait_timeout
+        self.max_queue = max_queue
+        self.min_idle = min(min_idle, pool_size)
+        self.pool = []
+        self.warming = 0  # Instâncias sendo criadas e logadas em background
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.waiters = deque()  # Fila FIFO de requisições aguardando
+        self.stats = {
+            'checkouts': 0,
+            'waited': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
+        default_username, default_password = get_credentials()
+        self.username = username or default_username
+        self.password = password or default_password
+        self.scraper_options = scraper_options or {}
+        self.on_login = on_login
+        self.started = False
+        self.logger = logging.getLogger(__name__)
+
+    def _take_available(self, affinity=None):
+        """Marca uma instância livre como em uso (chamar com o lock adquirido)
+
+        Com `affinity`, prefere a instância que está com esse bilhete aberto na tela.
+        """
+        current_time = time.time()
+        candidates = list(self.pool)
+        if affinity:
+            candidates.sort(key=lambda info: getattr(info[0], 'loaded_bet_code', None) != affinity)
+        for scraper_info in candidates:
+            scraper, last_used, in_use = scraper_info
+            if in_use or scraper is None:
+                continue
+
+            # Verificar se expirou
+            if current_time - last_used > POOL_TIMEOUT:
+                try:
+                    scraper.close()
+                except:
+                    pass
+                self.pool.remove(scraper_info)
+                metrics.POOL_EVICTIONS.inc(reason='expired')
+                continue
+
+            # Marcar como em uso
+            scraper_info[2] = True
+            scraper_info[1] = current_time
+            self.logger.info(f"Reutilizando scraper do pool (total: {len(self.pool)})")
+            return scraper_info
+
+        # Se não encontrou disponível e pool não está cheio, reservar vaga para nova instância
+        if len(self.pool) < self.pool_size:
+            scraper_info = [None, current_time, True]
+            self.pool.append(scraper_info)
+            return scraper_info
+
+        return None
+
+    def get_scraper(self, timeout=None, affinity=None):
+        """Obtém uma instância do scraper do pool, aguardando em fila FIFO até o prazo"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        start_time = time.time()
+        deadline = start_time + timeout
+        ticket = object()
+
+        with self.available:
+            if len(self.waiters) >= self.max_queue:
+                self.stats['rejected'] += 1
+                metrics.REJECTIONS.inc(endpoint=metrics.current_endpoint(), reason='pool_queue_full')
+                self.logger.warning(f"Fila do pool cheia ({len(self.waiters)} aguardando), rejeitando requisição")
+                return None
+
+            self.waiters.append(ticket)
+            scraper_info = None
+            logged_wait = False
+            try:
+                while True:
+                    # Apenas o primeiro da fila pode pegar uma instância (ordem de chegada)
+                    if self.waiters[0] is ticket:
+                        scraper_info = self._take_available(affinity)
+                        if scraper_info:
+                            break
+
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        metrics.REJECTIONS.inc(endpoint=metrics.current_endpoint(), reason='pool_timeout')
+                        self.logger.warning(f"Timeout aguardando scraper livre ({timeout:.1f}s)")
+                        return None
+
+                    if not logged_wait:
+                        self.logger.info(f"Pool de scrapers cheio, aguardando liberação (fila: {len(self.waiters)})...")
+                        logged_wait = True
+                    self.available.wait(remaining)
+            finally:
+                self.waiters.remove(ticket)
+                # Acordar o próximo da fila
+                self.available.notify_all()
+
+            wait_time = time.time() - start_time
+            metrics.PHASE_DURATION.observe(wait_time, phase='pool_wait', endpoint=metrics.current_endpoint())
+            self.stats['checkouts'] += 1
+            self.stats['wait_time_total'] += wait_time
+            self.stats['wait_time_max'] = max(self.stats['wait_time_max'], wait_time)
+            if wait_time > 0.01:
+                self.stats['waited'] += 1
+                self.logger.info(f"Scraper obtido após {wait_time:.2f}s na fila")
+
+            if scraper_info[0] is not None:
+                return scraper_info[0]
+
+        # Criar nova instância fora do lock (inicialização do Firefox é lenta)
+        try:
+            scraper = ValSportsScraper(**self.scraper_options)
+        except Exception:
+            with self.available:
+                self.pool.remove(scraper_info)
+                self.available.notify_all()
+            raise
+
+        with self.available:
+            scraper_info[0] = scraper
+            scraper_info[1] = time.time()
+            self.logger.info(f"Nova instância criada no pool (total: {len(self.pool)})")
+        return scraper
+
+    def _warm_instance(self, scraper_info):
+        """Cria e faz login de uma instância reservada, disponibilizando-a no pool"""
+        start_time = time.time()
+        scraper = None
+        try:
+            with metrics.endpoint('warmup'):
+                scraper = ValSportsScraper(**self.scraper_options)
+                if scraper.login(self.username, self.password):
+                    if self.on_login:
+                        self.on_login(scraper)
+                else:
+                    self.logger.warning("Falha no login durante aquecimento - login será refeito na requisição")
+        except Exception as e:
+            self.logger.error(f"Erro ao aquecer scraper: {str(e)}")
+
+        with self.available:
+            self.warming -= 1
+            if scraper is None:
+                self.pool.remove(scraper_info)
+            else:
+                scraper_info[0] = scraper
+                scraper_info[1] = time.time()
+                scraper_info[2] = False
+                self.logger.info(f"Scraper pré-aquecido em {time.time() - start_time:.2f}s (total: {len(self.pool)})")
+            self.available.notify_all()
+
+    def warm_up(self, count):
+        """Inicia e autentica até `count` instâncias em paralelo, sem bloquear"""
+        threads = []
+        with self.lock:
+            count = min(count, self.pool_size - len(self.pool))
+            for _ in range(max(count, 0)):
+                scraper_info = [None, time.time(), True]
+                self.pool.append(scraper_info)
+                self.warming += 1
+                threads.append(threading.Thread(target=self._warm_instance, args=(scraper_info,), daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        if threads:
+            self.logger.info(f"Aquecendo {len(threads)} scrapers em paralelo")
+        return threads
+
+    def ensure_min_idle(self):
+        """Repõe instâncias livres até o mínimo configurado"""
+        with self.lock:
+            idle = sum(1 for scraper_info in self.pool if scraper_info[0] is not None and not scraper_info[2])
+            missing = self.min_idle - idle - self.warming
+        if missing > 0:
+            self.warm_up(missing)
+
+    def checkout_logged_in(self, timeout=None, affinity=None):
+        """Obtém um scraper já logado; levanta CheckoutError (429/401) se não for possível"""
+        scraper = self.get_scraper(timeout, affinity)
+        if not scraper:
+            raise CheckoutError('Sistema ocupado. Tente novamente em alguns segundos.', 429)
+
+        # Fazer login automático (se necessário)
+        if not scraper.is_logged_in:
+            self.logger.info(f"Fazendo login para usuário: {self.username}")
+            if not scraper.login(self.username, self.password):
+                self.logger.error("Falha no login")
+                self.release_scraper(scraper)
+                raise CheckoutError('Falha no login - credenciais inválidas', 401)
+        else:
+            self.logger.info("Usando sessão existente")
+
+        return scraper
+
+    def release_scraper(self, scraper):
+        """Libera uma instância do scraper de volta ao pool"""
+        with self.available:
+            for scraper_info in self.pool:
+                if scraper_info[0] == scraper:
+                    scraper_info[2] = False
+                    scraper_info[1] = time.time()
+                    self.logger.info("Scraper liberado no pool")
+                    self.available.notify_all()
+                    return
+
+    def get_stats(self):
+        """Retorna métricas de uso e de espera na fila do pool"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['pool_size'] = self.pool_size
+            stats['instances'] = len(self.pool)
+            stats['in_use'] = sum(1 for scraper_info in self.pool if scraper_info[2]) - self.warming
+            stats['idle'] = sum(1 for scraper_info in self.pool if not scraper_info[2])
+            stats['warming'] = self.warming
+            stats['queue_depth'] = len(self.waiters)
+            stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+            return stats
+
+    def cleanup_expired(self):
+        """Limpa instâncias expiradas do pool"""
+        with self.lock:
+            current_time = time.time()
+            expired = []
+            for scraper_info in self.pool:
+                scraper, last_used, in_use = scraper_info
+                if not in_use and current_time - last_used > POOL_TIMEOUT:
+                    expired.append(scraper_info)
+
+            for scraper_info in expired:
+                try:
+                    scraper_info[0].close()
+                except:
+                    pass
+                self.pool.remove(scraper_info)
+                metrics.POOL_EVICTIONS.inc(reason='expired')
+
+            if expired:
+                self.logger.info(f"Limpou {len(expired)} scrapers expirados")
+
+    def close_all(self):
+        """Fecha todas as instâncias do pool"""
+        with self.lock:
+            for scraper_info in self.pool:
+                try:
+                    scraper_info[0].close()
+                except:
+                    pass
+            self.pool.clear()
+
+    def _cleanup_loop(self):
+        """Limpa scrapers expirados periodicamente"""
+        while True:
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                self.logger.error(f"Erro na limpeza de scrapers expirados: {str(e)}")
+            time.sleep(POOL_CLEANUP_INTERVAL)
+
+    def _refill_loop(self):
+        """Mantém o mínimo de scrapers livres e logados"""
+        while True:
+            try:
+                self.ensure_min_idle()
+            except Exception as e:
+                self.logger.error(f"Erro ao repor scrapers livres: {str(e)}")
+            time.sleep(POOL_REFILL_INTERVAL)
+
+    def start(self, warmup=POOL_WARMUP):
+        """Pré-aquece o pool (Firefox + login) e inicia as threads de limpeza e reposição
+
+        Só age na primeira chamada: quem importa um serviço como biblioteca pode
+        chamá-la no primeiro uso do pool sem duplicar as threads.
+        """
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+
+        threading.Thread(target=self._cleanup_loop, name="pool-cleanup", daemon=True).start()
+        self.logger.info("Thread de limpeza de scrapers expirados iniciada")
+
+        self.warm_up(warmup)
+        threading.Thread(target=self._refill_loop, name="pool-refill", daemon=True).start()
+        self.logger.info("Thread de reposição de scrapers livres iniciada")
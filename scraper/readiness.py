@@ -0,0 +1,101 @@
+import time
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from scraper import metrics
+
+logger = logging.getLogger(__name__)
+
+POLL_FREQUENCY = 0.1  # segundos entre verificações
+
+# O SPA do ValSports é Vue 2: o #app é substituído pelo componente raiz (div.home-main),
+# que recebe a propriedade __vue__ ao ser montado
+VUE_MOUNTED_SCRIPT = """
+if (document.readyState === 'loading' || !document.body) { return false; }
+var children = document.body.children;
+for (var i = 0; i < children.length; i++) {
+    if (children[i].__vue__ || children[i].__vue_app__) { return true; }
+}
+return !!document.querySelector('.home-main');
+"""
+
+# O documento antigo recebe uma marca antes da navegação; o novo nasce sem ela
+MARK_STALE_SCRIPT = "window.__valsportsStaleDocument = true;"
+NEW_DOCUMENT_SCRIPT = "return !window.__valsportsStaleDocument && document.readyState !== 'loading';"
+
+RESOURCE_COUNT_SCRIPT = "return performance.getEntriesByType('resource').length;"
+
+def _wait(driver, timeout, condition, description):
+    """Executa um WebDriverWait retornando False em caso de timeout"""
+    start_time = time.time()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+        logger.debug(f"⏱️ {description} em {time.time() - start_time:.2f}s")
+        return result
+    except TimeoutException:
+        logger.warning(f"⚠️ Timeout aguardando {description} ({timeout}s)")
+        return False
+
+
+def navigate(driver, url, timeout=15):
+    """driver.get que retorna com o novo documento já no DOMContentLoaded
+
+    Com pageLoadStrategy 'eager' ou 'none' o driver.get não espera os subrecursos;
+    esta espera garante que as verificações seguintes não vejam a página anterior.
+    """
+    with metrics.phase('navigation'):
+        try:
+            driver.execute_script(MARK_STALE_SCRIPT)
+        except Exception:
+            pass  # Sem documento carregado (about:blank inicial, contexto descartado)
+        driver.get(url)
+        return _wait(driver, timeout, lambda d: d.execute_script(NEW_DOCUMENT_SCRIPT), f"carregamento de {url}")
+
+
+def wait_for_vue_app(driver, timeout=15):
+    """Aguarda o documento carregar e o app Vue ser montado"""
+    return _wait(driver, timeout, lambda d: d.execute_script(VUE_MOUNTED_SCRIPT), "montagem do app Vue")
+
+
+def wait_for_network_idle(driver, idle_time=0.5, timeout=10):
+    """Aguarda até nenhum recurso novo ser requisitado durante `idle_time` segundos"""
+    state = {'count': -1, 'since': time.time()}
+
+    def network_idle(d):
+        count = d.execute_script(RESOURCE_COUNT_SCRIPT)
+        now = time.time()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= idle_time
+
+    return _wait(driver, timeout, network_idle, "rede ociosa")
+
+
+def wait_for_stable_count(driver, css_selector, settle_time=0.3, timeout=10, min_count=1):
+    """Aguarda a quantidade de elementos do seletor parar de mudar"""
+    state = {'count': -1, 'since': time.time()}
+
+    def count_settled(d):
+        count = d.execute_script("return document.querySelectorAll(arguments[0]).length;", css_selector)
+        now = time.time()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return count >= min_count and now - state['since'] >= settle_time
+
+    if _wait(driver, timeout, count_settled, f"estabilização de '{css_selector}'"):
+        return state['count']
+    return 0
+
+
+def wait_for_url_without(driver, fragment, timeout=10):
+    """Aguarda a URL atual deixar de conter `fragment`"""
+    return _wait(driver, timeout, lambda d: fragment not in d.current_url.lower(), f"saída de '{fragment}'")
+
+
+def wait_for_script(driver, script, timeout=5, description="condição do script"):
+    """Aguarda o script retornar um valor verdadeiro"""
+    return _wait(driver, timeout, lambda d: d.execute_script(script), description)
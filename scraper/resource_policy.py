@@ -0,0 +1,109 @@
+import logging
+import os
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Domínios de analytics/rastreamento que não influenciam o bilhete nem a confirmação
+DEFAULT_BLOCKLIST = [
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googleadservices.com',
+    'facebook.net', 'facebook.com', 'hotjar.com', 'clarity.ms', 'tiktok.com', 'analytics.tiktok.com',
+    'onesignal.com', 'sentry.io', 'newrelic.com', 'nr-data.net'
+]
+
+# Preferências do Firefox por perfil de operação (todos definem as mesmas chaves,
+# para que a troca em tempo de execução não herde valores do perfil anterior)
+# - capture: só o DOM do bilhete importa (sem imagens, fontes, mídia e rastreadores)
+# - confirm: cliques em botões; mantém fontes para não alterar o layout dos modais
+# - debug: tudo carregado, para screenshots fiéis
+RESOURCE_PROFILES = {
+    'capture': {
+        'permissions.default.image': 2,
+        'browser.display.use_document_fonts': 0,
+        'gfx.downloadable_fonts.enabled': False,
+        'media.autoplay.default': 5,
+        'media.autoplay.blocking_policy': 2,
+        'media.webspeech.synth.enabled': False,
+        'block_trackers': True,
+    },
+    'confirm': {
+        'permissions.default.image': 2,
+        'browser.display.use_document_fonts': 1,
+        'gfx.downloadable_fonts.enabled': True,
+        'media.autoplay.default': 5,
+        'media.autoplay.blocking_policy': 2,
+        'media.webspeech.synth.enabled': False,
+        'block_trackers': True,
+    },
+    'debug': {
+        'permissions.default.image': 1,
+        'browser.display.use_document_fonts': 1,
+        'gfx.downloadable_fonts.enabled': True,
+        'media.autoplay.default': 0,
+        'media.autoplay.blocking_policy': 0,
+        'media.webspeech.synth.enabled': True,
+        'block_trackers': False,
+    },
+}
+
+
+def get_blocklist():
+    """Blocklist padrão mais os domínios extras de RESOURCE_BLOCKLIST (separados por vírgula)"""
+    extra = [domain.strip() for domain in os.environ.get('RESOURCE_BLOCKLIST', '').split(',') if domain.strip()]
+    return DEFAULT_BLOCKLIST + extra
+
+
+def _blocklist_pac(blocklist):
+    """PAC que envia os domínios bloqueados para um proxy inexistente (falha imediata)"""
+    conditions = ' || '.join(
+        f"host == '{domain}' || dnsDomainIs(host, '.{domain}')" for domain in blocklist
+    )
+    script = (
+        "function FindProxyForURL(url, host) {"
+        f" if ({conditions}) {{ return 'PROXY 127.0.0.1:9'; }}"
+        " return 'DIRECT'; }"
+    )
+    return "data:application/x-ns-proxy-autoconfig," + quote(script)
+
+
+def profile_prefs(profile):
+    """Preferências do Firefox (nome -> valor) para o perfil"""
+    settings = dict(RESOURCE_PROFILES.get(profile, RESOURCE_PROFILES['capture']))
+    block_trackers = settings.pop('block_trackers', False)
+
+    if block_trackers:
+        settings['network.proxy.type'] = 2
+        settings['network.proxy.autoconfig_url'] = _blocklist_pac(get_blocklist())
+    else:
+        settings['network.proxy.type'] = 0
+    return settings
+
+
+def apply_to_options(firefox_options, profile):
+    """Aplica o perfil nas opções antes de iniciar o Firefox"""
+    for name, value in profile_prefs(profile).items():
+        firefox_options.set_preference(name, value)
+
+
+# Altera preferências em tempo de execução pelo contexto chrome do Marionette
+SET_PREFS_SCRIPT = """
+var prefs = arguments[0];
+for (var name in prefs) {
+    var value = prefs[name];
+    if (typeof value === 'boolean') { Services.prefs.setBoolPref(name, value); }
+    else if (typeof value === 'number') { Services.prefs.setIntPref(name, value); }
+    else { Services.prefs.setStringPref(name, value); }
+}
+return true;
+"""
+
+
+def apply_to_driver(driver, profile):
+    """Troca o perfil de um Firefox já aberto; retorna False se não for suportado"""
+    try:
+        with driver.context(driver.CONTEXT_CHROME):
+            driver.execute_script(SET_PREFS_SCRIPT, profile_prefs(profile))
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Não foi possível aplicar o perfil de recursos '{profile}': {str(e)}")
+        return False
@@ -0,0 +1,125 @@
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TicketCache:
+    """Cache LRU+TTL de bilhetes capturados, indexado pelo código do bilhete
+
+    Por padrão fica em memória no processo. Com `redis_url` os resultados são
+    compartilhados entre workers via Redis (ou servidor compatível); se o pacote
+    `redis` não estiver instalado ou o servidor não responder, volta para memória.
+    """
+
+    def __init__(self, max_entries=256, ttl=60, redis_url=None, key_prefix='valsports:ticket:'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # bet_code -> (expira_em, bet_data)
+        self.stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'invalidations': 0, 'errors': 0}
+        self.redis = self._connect_redis(redis_url) if redis_url else None
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @property
+    def backend(self):
+        return 'redis' if self.redis is not None else 'memory'
+
+    def _connect_redis(self, redis_url):
+        """Conecta ao Redis; retorna None para usar o cache em memória"""
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            client.ping()
+            logger.info(f"🗄️ Cache de bilhetes usando Redis em {redis_url}")
+            return client
+        except ImportError:
+            logger.warning("⚠️ Pacote 'redis' não instalado - cache de bilhetes em memória")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponível ({str(e)}) - cache de bilhetes em memória")
+        return None
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def get(self, bet_code):
+        """Retorna o bet_data em cache ou None (ausente ou expirado)"""
+        if not self.enabled:
+            return None
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self.key_prefix + bet_code)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao ler cache Redis: {str(e)}")
+                self._count('errors')
+                raw = None
+            self._count('hits' if raw else 'misses')
+            return json.loads(raw) if raw else None
+
+        with self.lock:
+            entry = self.entries.get(bet_code)
+            if entry and entry[0] > time.time():
+                self.entries.move_to_end(bet_code)
+                self.stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            if entry:
+                del self.entries[bet_code]
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, bet_code, bet_data):
+        """Armazena o bet_data do bilhete pelo TTL configurado"""
+        if not self.enabled or not bet_data:
+            return
+
+        if self.redis is not None:
+            try:
+                self.redis.setex(self.key_prefix + bet_code, int(self.ttl) or 1, json.dumps(bet_data))
+                self._count('sets')
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao gravar cache Redis: {str(e)}")
+                self._count('errors')
+            return
+
+        with self.lock:
+            self.entries[bet_code] = (time.time() + self.ttl, copy.deepcopy(bet_data))
+            self.entries.move_to_end(bet_code)
+            self.stats['sets'] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, bet_code):
+        """Remove o bilhete do cache (ex.: após confirmação, quando o estado muda)"""
+        if self.redis is not None:
+            try:
+                self.redis.delete(self.key_prefix + bet_code)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao invalidar cache Redis: {str(e)}")
+                self._count('errors')
+        else:
+            with self.lock:
+                self.entries.pop(bet_code, None)
+        self._count('invalidations')
+
+    def get_stats(self):
+        """Estatísticas de uso do cache"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries) if self.redis is None else None
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['backend'] = self.backend
+        stats['ttl'] = self.ttl
+        stats['max_entries'] = self.max_entries
+        return stats
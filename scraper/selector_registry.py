@@ -0,0 +1,177 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from scraper import readiness
+
+logger = logging.getLogger(__name__)
+
+# Procura todos os candidatos numa única ida ao navegador e devolve o primeiro visível e habilitado
+# (mesmo critério do EC.element_to_be_clickable). XPath inválido ou seletor CSS inválido só não casa.
+FIRST_MATCH_SCRIPT = """
+var candidates = arguments[0];
+function usable(el) {
+    return (el.offsetParent !== null || el.getClientRects().length) && !el.disabled;
+}
+for (var i = 0; i < candidates.length; i++) {
+    var kind = candidates[i][0], selector = candidates[i][1];
+    try {
+        if (kind === 'xpath') {
+            var found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < found.snapshotLength; j++) {
+                if (usable(found.snapshotItem(j))) { return [i, found.snapshotItem(j)]; }
+            }
+        } else {
+            var elements = document.querySelectorAll(selector);
+            for (var k = 0; k < elements.length; k++) {
+                if (usable(elements[k])) { return [i, elements[k]]; }
+            }
+        }
+    } catch (e) {}
+}
+return null;
+"""
+
+# Prazo em que só os candidatos específicos podem casar antes de liberar os genéricos
+FALLBACK_DELAY = float(os.environ.get('SELECTOR_FALLBACK_DELAY', 1.0))
+
+
+class SelectorRegistry:
+    """Ranking de seletores por alvo lógico (ex.: 'confirm.yes_button'), aprendido com os acertos
+
+    Cada alvo guarda acertos e erros por seletor; os candidatos são tentados na
+    ordem da taxa de acerto (suavizada), com a ordem original como desempate.
+    O ranking é salvo em disco e sobrevive a reinícios.
+    """
+
+    def __init__(self, path=None, learning=None, save_interval=30):
+        self.path = path or os.environ.get('SELECTOR_RANKING_FILE', 'selector_ranking.json')
+        if learning is None:
+            learning = os.environ.get('SELECTOR_LEARNING', 'True').lower() == 'true'
+        self.learning = learning
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.stats = {}  # alvo -> seletor -> [acertos, erros]
+        self.dirty = False
+        self.last_save = time.time()
+        if self.learning:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.stats = {
+                    target: {selector: list(counts) for selector, counts in selectors.items()}
+                    for target, selectors in json.load(f).items()
+                }
+            logger.info(f"📈 Ranking de seletores carregado ({len(self.stats)} alvos)")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler ranking de seletores: {str(e)}")
+
+    def save(self):
+        """Grava o ranking em disco (escrita atômica)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            snapshot = json.dumps(self.stats, ensure_ascii=False, indent=1)
+            self.dirty = False
+            self.last_save = time.time()
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar ranking de seletores: {str(e)}")
+
+    def ordered(self, target, candidates):
+        """Candidatos na ordem de tentativa para o alvo"""
+        if not self.learning:
+            return list(candidates)
+        with self.lock:
+            counts = self.stats.get(target, {})
+
+            def score(item):
+                position, selector = item
+                hits, misses = counts.get(selector, (0, 0))
+                return (-(hits + 1) / (hits + misses + 2), position)
+
+            return [selector for _, selector in sorted(enumerate(candidates), key=score)]
+
+    def record(self, target, winner, tried):
+        """Registra o seletor vencedor e os que foram tentados antes dele sem casar"""
+        if not self.learning:
+            return
+        with self.lock:
+            counts = self.stats.setdefault(target, {})
+            for selector in tried:
+                entry = counts.setdefault(selector, [0, 0])
+                if selector == winner:
+                    entry[0] += 1
+                else:
+                    entry[1] += 1
+            self.dirty = True
+            due = time.time() - self.last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def find_first(self, driver, target, candidates, timeout=10, by=None, fallbacks=()):
+        """Aguarda qualquer candidato ficar clicável; retorna (elemento, seletor, tentados)
+
+        Um único prazo para todos os candidatos: o seletor ausente não custa mais
+        um timeout inteiro antes do próximo. `by='xpath'` trata todos como XPath;
+        sem `by`, seletores iniciados por '/' são XPath e os demais CSS.
+
+        `fallbacks` são seletores genéricos (ex.: '.btn-group button') que casariam
+        antes de o elemento certo renderizar: só entram após FALLBACK_DELAY (ou
+        metade do prazo) e ficam fora do ranking aprendido.
+        """
+        ranked = self.ordered(target, candidates)
+        ordered = ranked + list(fallbacks)
+        script_args = [['xpath' if by == 'xpath' or selector.startswith('/') else 'css', selector] for selector in ordered]
+        exclusive_until = time.time() + min(FALLBACK_DELAY, timeout / 2)
+
+        def first_match(d):
+            allowed = script_args if time.time() >= exclusive_until else script_args[:len(ranked)]
+            return d.execute_script(FIRST_MATCH_SCRIPT, allowed)
+
+        try:
+            match = WebDriverWait(driver, timeout, poll_frequency=readiness.POLL_FREQUENCY).until(first_match)
+        except TimeoutException:
+            logger.warning(f"⚠️ Nenhum seletor de '{target}' encontrado em {timeout}s ({len(ordered)} candidatos)")
+            return None, None, len(ordered)
+
+        index, element = match
+        winner = ordered[index]
+        if index < len(ranked):
+            self.record(target, winner, ranked[:index + 1])
+        else:
+            logger.info(f"ℹ️ '{target}' encontrado só pelo seletor genérico {winner}")
+        logger.debug("Seletor de '%s' encontrado: %s (%d/%d)", target, winner, index + 1, len(ordered))
+        return element, winner, index + 1
+
+    def get_stats(self):
+        """Melhor seletor e taxa de acerto de cada alvo"""
+        with self.lock:
+            summary = {}
+            for target, counts in self.stats.items():
+                selector, (hits, misses) = max(counts.items(), key=lambda item: item[1][0])
+                summary[target] = {
+                    'best': selector,
+                    'hits': hits,
+                    'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0
+                }
+            return {'learning': self.learning, 'targets': summary}
+
+
+# Ranking compartilhado por todos os scrapers do processo
+selector_registry = SelectorRegistry()
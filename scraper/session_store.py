@@ -0,0 +1,174 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+
+from scraper import readiness
+
+logger = logging.getLogger(__name__)
+
+# Marcador que só existe com usuário logado (item "Sair" do menu do usuário)
+LOGGED_IN_SCRIPT = """
+if (location.pathname.indexOf('login') !== -1) { return false; }
+return !!document.querySelector('.fa-sign-out-alt');
+"""
+
+READ_STORAGE_SCRIPT = """
+var s = {};
+for (var i = 0; i < window.localStorage.length; i++) {
+    var k = window.localStorage.key(i);
+    s[k] = window.localStorage.getItem(k);
+}
+return s;
+"""
+
+WRITE_STORAGE_SCRIPT = """
+var s = arguments[0];
+for (var k in s) { window.localStorage.setItem(k, s[k]); }
+return true;
+"""
+
+# Chave aleatória do diretório de sessões para o HMAC das credenciais (nunca sai do disco local)
+FINGERPRINT_KEY_FILE = '.fingerprint.key'
+
+
+class SessionStore:
+    """Sessões logadas (cookies + localStorage) salvas em disco e reaproveitadas por novos drivers"""
+
+    def __init__(self, directory=None, max_age=None):
+        self.directory = directory or os.environ.get('SESSION_STORE_DIR', 'sessions')
+        self.max_age = max_age if max_age is not None else float(os.environ.get('SESSION_MAX_AGE', 12 * 3600))
+        self.lock = threading.Lock()
+        self._fingerprint_key = None
+
+    def _key(self):
+        """Chave do HMAC: lida do diretório ou criada uma única vez (0600) se ainda não existir"""
+        with self.lock:
+            if self._fingerprint_key is None:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, FINGERPRINT_KEY_FILE)
+                if not os.path.exists(path):
+                    temp_path = f"{path}.{os.getpid()}.tmp"
+                    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(secrets.token_bytes(32))
+                    try:
+                        # link é atômico: se outro processo criou a chave antes, vale a dele
+                        os.link(temp_path, path)
+                    except FileExistsError:
+                        pass
+                    finally:
+                        os.remove(temp_path)
+                with open(path, 'rb') as f:
+                    self._fingerprint_key = f.read()
+            return self._fingerprint_key
+
+    def _fingerprint(self, username, password):
+        """Identifica as credenciais sem permitir testar senhas contra o arquivo salvo"""
+        return hmac.new(self._key(), f"{username}:{password}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _path(self, username):
+        safe_name = re.sub(r'[^\w.-]', '_', username or 'default')
+        return os.path.join(self.directory, f"{safe_name}.json")
+
+    def save(self, driver, username, password):
+        """Salva cookies e localStorage do navegador logado"""
+        try:
+            session = {
+                'username': username,
+                'fingerprint': self._fingerprint(username, password),
+                'saved_at': time.time(),
+                'cookies': driver.get_cookies(),
+                'local_storage': driver.execute_script(READ_STORAGE_SCRIPT) or {}
+            }
+
+            with self.lock:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self._path(username)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(session, f)
+                os.chmod(temp_path, 0o600)
+                os.replace(temp_path, path)
+
+            logger.info(f"💾 Sessão de {username} salva ({len(session['cookies'])} cookies)")
+            return True
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar sessão: {str(e)}")
+            return False
+
+    def load(self, username, password):
+        """Retorna a sessão salva do usuário, ou None se não existir, expirou ou é de outra senha"""
+        path = self._path(username)
+        try:
+            expected = self._fingerprint(username, password)
+            with self.lock:
+                if not os.path.exists(path):
+                    return None
+                with open(path, encoding='utf-8') as f:
+                    session = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler sessão salva: {str(e)}")
+            return None
+
+        # A sessão só vale para as mesmas credenciais que a criaram
+        if not hmac.compare_digest(str(session.get('fingerprint', '')), expected):
+            return None
+
+        if time.time() - session.get('saved_at', 0) > self.max_age:
+            logger.info(f"ℹ️ Sessão salva de {username} expirada")
+            return None
+        return session
+
+    def discard(self, username):
+        """Remove a sessão salva (ex.: quando a sonda de validade falha)"""
+        with self.lock:
+            try:
+                os.remove(self._path(username))
+            except FileNotFoundError:
+                pass
+
+    def restore(self, driver, base_url, username, password, probe_timeout=5):
+        """Injeta a sessão salva no driver e verifica se continua válida; retorna True se logado"""
+        session = self.load(username, password)
+        if not session:
+            return False
+
+        try:
+            start_time = time.time()
+
+            # Cookies só podem ser definidos estando no domínio: usar um recurso leve do site
+            readiness.navigate(driver, f"{base_url}/favicon.ico")
+            now = time.time()
+            for cookie in session['cookies']:
+                if cookie.get('expiry') and cookie['expiry'] < now:
+                    continue
+                cookie = {key: value for key, value in cookie.items() if key != 'sameSite' or value in ('Strict', 'Lax', 'None')}
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Cookie {cookie.get('name')} ignorado: {str(e)}")
+
+            if session.get('local_storage'):
+                driver.execute_script(WRITE_STORAGE_SCRIPT, session['local_storage'])
+
+            # Sonda de validade: a home precisa mostrar o menu do usuário logado
+            readiness.navigate(driver, base_url)
+            readiness.wait_for_vue_app(driver)
+            if readiness.wait_for_script(driver, LOGGED_IN_SCRIPT, probe_timeout, "menu do usuário logado"):
+                logger.info(f"♻️ Sessão de {username} restaurada em {time.time() - start_time:.2f}s")
+                return True
+
+            logger.info(f"ℹ️ Sessão salva de {username} não é mais válida")
+            self.discard(username)
+            return False
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao restaurar sessão: {str(e)}")
+            return False
@@ -0,0 +1,69 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Execução em andamento compartilhada pelos chamadores da mesma chave"""
+
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução
+
+    O primeiro chamador executa a função; os demais aguardam e recebem o mesmo
+    resultado (ou a mesma exceção) sem repetir o trabalho.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key, function):
+        """Executa `function` uma vez por chave em andamento; retorna (resultado, compartilhado)"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self.calls[key] = _Call()
+                self.stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            logger.info(f"🔗 Aguardando execução em andamento para {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            if call.waiters:
+                logger.info(f"🔗 Resultado de {key} compartilhado com {call.waiters} requisição(ões)")
+            call.event.set()
+
+    def get_stats(self):
+        """Estatísticas de execuções e chamadas agrupadas"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self.calls)
+        return stats
@@ -0,0 +1,189 @@
+import logging
+import re
+from html.parser import HTMLParser
+
+from scraper.js_extractor import build_bet_data
+
+logger = logging.getLogger(__name__)
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+SKIP_TAGS = {'script', 'style', 'noscript'}
+
+
+class Node:
+    """Elemento mínimo da árvore HTML (tag, classes, atributos e filhos)"""
+
+    __slots__ = ('tag', 'classes', 'attrs', 'children', 'parts')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = set((attrs.get('class') or '').split())
+        self.children = []
+        self.parts = []  # Textos e elementos filhos na ordem do documento
+
+    def has(self, *classes):
+        """Verifica se o elemento possui todas as classes"""
+        return all(cls in self.classes for cls in classes)
+
+    def text(self):
+        """Texto do elemento com espaços normalizados (equivalente ao textContent)"""
+        return re.sub(r'\s+', ' ', ''.join(_ordered_text(self))).strip()
+
+    def iter(self):
+        """Percorre os descendentes em profundidade"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def find(self, predicate):
+        """Primeiro descendente que satisfaz o predicado"""
+        return next((node for node in self.iter() if predicate(node)), None)
+
+    def find_all(self, predicate):
+        """Todos os descendentes que satisfazem o predicado"""
+        return [node for node in self.iter() if predicate(node)]
+
+
+def _ordered_text(node):
+    """Gera os textos do elemento na ordem do documento"""
+    for part in node.parts:
+        if isinstance(part, str):
+            yield part
+        else:
+            yield from _ordered_text(part)
+
+
+class _TreeBuilder(HTMLParser):
+    """Constrói a árvore de Node a partir do HTML capturado"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {})
+        self.stack = [self.root]
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth or tag in SKIP_TAGS:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+
+        node = Node(tag, {name: value or '' for name, value in attrs})
+        parent = self.stack[-1]
+        parent.children.append(node)
+        parent.parts.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_depth:
+            return
+        node = Node(tag, {name: value or '' for name, value in attrs})
+        self.stack[-1].children.append(node)
+        self.stack[-1].parts.append(node)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+
+        # Fechar até a tag correspondente (tolerante a HTML malformado)
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.stack[-1].parts.append(data)
+
+
+def parse_html(html):
+    """Converte o HTML em uma árvore de Node"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def extract_payload(root):
+    """Extrai do HTML o mesmo payload do TICKET_EXTRACTION_SCRIPT"""
+    ticket = root.find(lambda node: node.has('scroll-area-ticket'))
+    payload = {
+        'found': ticket is not None,
+        'games_count': '',
+        'total_odds': '',
+        'possible_prize': '',
+        'bettor_name': '',
+        'bet_value': '',
+        'games': []
+    }
+    if ticket is None:
+        return payload
+
+    counter = ticket.find(lambda node: node.tag == 'span' and node.has('text-theme', 'ml-2'))
+    payload['games_count'] = counter.text() if counter else ''
+
+    for item in ticket.find_all(lambda node: node.has('l-item', 'd-block')):
+        row = next((child for child in item.children if child.has('row')), item)
+        game = {'league': '', 'datetime': '', 'teams': [], 'selection': '', 'odds': ''}
+
+        for cell in row.children:
+            if cell.has('w-100'):
+                continue
+            if cell.has('l-item-emphasis'):
+                game['league'] = cell.text()
+            elif cell.has('col-auto', 'text-theme'):
+                game['odds'] = cell.text()
+            elif cell.has('col-auto', 'small') and not game['datetime']:
+                game['datetime'] = cell.text()
+            elif cell.has('col', 'text-theme'):
+                game['selection'] = cell.text()
+            elif cell.has('col', 'text-truncate') and not cell.has('col-auto'):
+                game['teams'].append(cell.text())
+
+        payload['games'].append(game)
+
+    # Rodapé com totais fica fora da área rolável do bilhete
+    footer = root.find(lambda node: node.has('bottom-shap'))
+    if footer:
+        for row in footer.find_all(lambda node: node.has('row')):
+            if len(row.children) < 2:
+                continue
+            label = row.children[0].text().lower()
+            if 'total odds' in label:
+                payload['total_odds'] = row.children[-1].text()
+            if 'possível prêmio' in label:
+                payload['possible_prize'] = row.children[-1].text()
+
+    # O valor digitado nos inputs só existe no HTML se vier como atributo
+    for node in root.find_all(lambda node: node.tag == 'input'):
+        placeholder = node.attrs.get('placeholder', '')
+        if 'Apostador' in placeholder and not payload['bettor_name']:
+            payload['bettor_name'] = node.attrs.get('value', '')
+        elif 'Valor' in placeholder and not payload['bet_value']:
+            payload['bet_value'] = node.attrs.get('value', '')
+
+    return payload
+
+
+def parse_ticket_html(html, bet_code, bettor_name='', bet_value=''):
+    """Extrai o bet_data de um snapshot HTML do bilhete, sem navegador"""
+    try:
+        payload = extract_payload(parse_html(html))
+        if not payload['found']:
+            logger.warning(f"⚠️ Bilhete lateral não encontrado no HTML de {bet_code}")
+            return None
+
+        # Valores dos inputs capturados do DOM vivo (não aparecem no page_source)
+        payload['bettor_name'] = bettor_name or payload['bettor_name']
+        payload['bet_value'] = bet_value or payload['bet_value']
+        return build_bet_data(payload, bet_code)
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao analisar HTML do bilhete {bet_code}: {str(e)}")
+        return None
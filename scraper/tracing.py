@@ -0,0 +1,269 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Spans no modelo do OpenTelemetry exportados como OTLP/JSON (sem dependências externas)
+# - file: um lote OTLP por linha em TRACE_FILE (importável no collector via filelog/otlpjson)
+# - otlp: POST no endpoint OTLP/HTTP do collector (ex.: http://localhost:4318/v1/traces)
+EXPORTERS = ('off', 'file', 'otlp')
+
+SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'valsports-scraper')
+
+_context = threading.local()
+
+
+def _now_ns():
+    return time.time_ns()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    """Trecho cronometrado de uma requisição (mesmos campos de um span OpenTelemetry)"""
+
+    def __init__(self, name, trace_id, request_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = _now_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, message):
+        self.error = str(message)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = _now_ns()
+            exporter.export(self)
+
+    @property
+    def duration(self):
+        return ((self.end_ns or _now_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self):
+        attributes = dict(self.attributes, **{'request.id': self.request_id})
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Span usado com a exportação desligada: mesma interface, sem custo"""
+
+    trace_id = span_id = request_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_error(self, message):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Exporta os spans finalizados em lotes, numa thread de fundo com fila limitada"""
+
+    def __init__(self, mode=None, path=None, endpoint=None, batch_size=64, flush_interval=2.0, max_queue=2048):
+        self.mode = (mode or os.environ.get('TRACE_EXPORT', 'off')).lower()
+        if self.mode not in EXPORTERS:
+            logger.warning(f"⚠️ TRACE_EXPORT inválido ({self.mode}), usando 'off'")
+            self.mode = 'off'
+        self.path = path or os.environ.get('TRACE_FILE', 'traces.jsonl')
+        self.endpoint = endpoint or os.environ.get('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.worker = None
+        self.stats = {'exported': 0, 'dropped': 0, 'errors': 0}
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def export(self, span):
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            # Rastreamento nunca pode segurar a requisição
+            with self.lock:
+                self.stats['dropped'] += 1
+
+    def _ensure_worker(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                self.worker.start()
+
+    def _export_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+                with self.lock:
+                    self.stats['exported'] += len(batch)
+            except Exception as e:
+                with self.lock:
+                    self.stats['errors'] += 1
+                logger.warning(f"⚠️ Erro ao exportar spans: {str(e)}")
+
+    def _payload(self, batch):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': _otlp_value(SERVICE_NAME)}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'scraper.tracing'},
+                    'spans': [span.to_otlp() for span in batch]
+                }]
+            }]
+        }
+
+    def _write(self, batch):
+        payload = self._payload(batch)
+        if self.mode == 'file':
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+        elif self.mode == 'otlp':
+            response = requests.post(self.endpoint, json=payload, timeout=5)
+            response.raise_for_status()
+
+    def get_stats(self):
+        """Estatísticas da exportação"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['mode'] = self.mode
+        stats['pending'] = self.queue.qsize()
+        return stats
+
+
+# Exportador compartilhado pelo scraper e pela API
+exporter = SpanExporter()
+
+
+def _stack():
+    stack = getattr(_context, 'stack', None)
+    if stack is None:
+        stack = _context.stack = []
+    return stack
+
+
+def current_span():
+    """Span ativo na thread atual (ou None)"""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def start_request(name, request_id=None, **attributes):
+    """Abre o span raiz de uma requisição e o torna ativo na thread atual
+
+    O trace id é sempre um id OpenTelemetry válido; o `request_id` recebido do
+    cliente (ex.: X-Request-ID) vai como atributo de todos os spans.
+    """
+    _context.stack = []
+    if not exporter.enabled:
+        return NOOP_SPAN
+    trace_id = uuid.uuid4().hex
+    root = Span(name, trace_id, request_id or trace_id, attributes=attributes)
+    _context.stack.append(root)
+    return root
+
+
+def end_request(root, **attributes):
+    """Fecha o span raiz e limpa o contexto da thread"""
+    root.set_attributes(attributes)
+    root.end()
+    _context.stack = []
+
+
+@contextmanager
+def attach(parent):
+    """Continua o trace de `parent` em outra thread (jobs, lotes)"""
+    stack = _stack()
+    previous = list(stack)
+    stack[:] = [parent] if isinstance(parent, Span) else []
+    try:
+        yield
+    finally:
+        stack[:] = previous
+
+
+@contextmanager
+def span(name, **attributes):
+    """Span filho do span ativo; exceções marcam o span com erro e são propagadas"""
+    parent = current_span()
+    if not exporter.enabled:
+        yield NOOP_SPAN
+        return
+
+    if parent is None:
+        trace_id = uuid.uuid4().hex
+        child = Span(name, trace_id, trace_id, attributes=attributes)
+    else:
+        child = Span(name, parent.trace_id, parent.request_id, parent.span_id, attributes)
+
+    stack = _stack()
+    stack.append(child)
+    try:
+        yield child
+    except Exception as e:
+        child.record_error(e)
+        raise
+    finally:
+        stack.remove(child)
+        child.end()
@@ -1,6 +1,7 @@
 import time
 import logging
 import re
+import random
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,16 +10,55 @@ from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.firefox.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import os
+from scraper import readiness
+from scraper import js_extractor
+from scraper import resource_policy
+from scraper import metrics
+from scraper import tracing
+from scraper.session_store import SessionStore
+from scraper.debug_artifacts import debug_artifacts
+from scraper.selector_registry import selector_registry
+from scraper.confirm_engine import ConfirmEngine
 
 logger = logging.getLogger(__name__)
 
+# Sessão logada compartilhada em disco entre todos os drivers (SESSION_STORE=False desativa)
+SESSION_STORE = SessionStore() if os.environ.get('SESSION_STORE', 'True').lower() == 'true' else None
+
+# Fração dos bilhetes com o log detalhado (linha a linha) emitido em INFO; os demais ficam em DEBUG
+LOG_VERBOSE_SAMPLE_RATE = float(os.environ.get('LOG_VERBOSE_SAMPLE_RATE', 0))
+
+# Confirmação reaproveita a página /prebet já carregada pela captura até esta idade (segundos)
+PREBET_REUSE_MAX_AGE = float(os.environ.get('PREBET_REUSE_MAX_AGE', 120))
+
+def get_credentials():
+    """Usuário e senha do ambiente (VALSPORTS_*, com VALSORTS_* das configurações antigas)"""
+    username = os.environ.get('VALSPORTS_USERNAME') or os.environ.get('VALSORTS_USERNAME', 'cairovinicius')
+    password = os.environ.get('VALSPORTS_PASSWORD') or os.environ.get('VALSORTS_PASSWORD', '279999')
+    return username, password
+
 class ValSportsScraper:
-    def __init__(self):
-        """Inicializa o scraper com configurações otimizadas"""
+    def __init__(self, headless=None, window_size=(1200, 800), implicit_wait=2):
+        """Inicializa o scraper com configurações otimizadas
+
+        `headless` None segue a variável HEADLESS; os serviços avulsos forçam True.
+        """
+        self.headless = os.environ.get('HEADLESS', 'False').lower() == 'true' if headless is None else headless
+        self.window_size = window_size
+        self.implicit_wait = implicit_wait
         self.driver = None
         self.is_logged_in = False
         self.base_url = "https://www.valsports.net"
         self.session_start_time = None
+        self.session_store = SESSION_STORE
+        self.detail_level = logging.DEBUG  # Nível do log por elemento da extração (ver LOG_VERBOSE_SAMPLE_RATE)
+        self.loaded_bet_code = None  # Bilhete aberto na aba principal pela última captura
+        self.loaded_bet_at = 0
+        self.last_verification = None  # Resultado e evidência da última confirmação (ver ConfirmVerifier)
+        # 'auto' alterna capture/confirm por operação; um nome de perfil fixa o perfil para tudo
+        self.resource_policy = os.environ.get('RESOURCE_PROFILE', 'auto').lower()
+        self.resource_profile = 'capture' if self.resource_policy == 'auto' else self.resource_policy
+        self.resource_switching = True  # Desligado na primeira falha (Firefox sem contexto chrome)
         self.setup_driver()
     
     def setup_driver(self):
@@ -28,7 +68,7 @@ class ValSportsScraper:
             firefox_options = Options()
             
             # Configurações para ambiente headless (opcional)
-            if os.environ.get('HEADLESS', 'False').lower() == 'true':
+            if self.headless:
                 firefox_options.add_argument("--headless")
             
             # Configurações de performance
@@ -41,32 +81,72 @@ class ValSportsScraper:
             # Permitir JavaScript (necessário para o site)
             firefox_options.set_preference("javascript.enabled", True)
             
+            # 'eager' retorna no DOMContentLoaded; os elementos extraídos têm esperas explícitas
+            page_load_strategy = os.environ.get('PAGE_LOAD_STRATEGY', 'eager').lower()
+            if page_load_strategy not in ('normal', 'eager', 'none'):
+                logger.warning(f"PAGE_LOAD_STRATEGY inválido ({page_load_strategy}), usando 'eager'")
+                page_load_strategy = 'eager'
+            firefox_options.page_load_strategy = page_load_strategy
+            
+            # Bloquear imagens, fontes, mídia e rastreadores conforme o perfil
+            resource_policy.apply_to_options(firefox_options, self.resource_profile)
+            
             # Inicializar driver do Firefox
-            self.driver = webdriver.Firefox(options=firefox_options)
+            with metrics.phase('driver_startup'):
+                self.driver = webdriver.Firefox(options=firefox_options)
             
             # Configurar timeouts otimizados
-            self.driver.implicitly_wait(2)  # Reduzido para 2 segundos
+            self.driver.implicitly_wait(self.implicit_wait)
             self.driver.set_page_load_timeout(15)  # Reduzido para 15 segundos
             
             # Configurar tamanho da janela
-            self.driver.set_window_size(1200, 800)
+            self.driver.set_window_size(*self.window_size)
             
-            logger.info("Driver do Firefox configurado com configurações otimizadas")
+            logger.info(
+                f"Driver do Firefox configurado com configurações otimizadas "
+                f"(perfil de recursos: {self.resource_profile}, carregamento: {firefox_options.page_load_strategy})"
+            )
             
         except Exception as e:
             logger.error(f"Erro ao configurar driver: {str(e)}")
             raise
     
+    def use_resource_profile(self, profile):
+        """Troca o perfil de recursos do navegador para a operação (capture, confirm, debug)"""
+        if self.resource_policy != 'auto' or not self.resource_switching or profile == self.resource_profile:
+            return
+        if resource_policy.apply_to_driver(self.driver, profile):
+            self.resource_profile = profile
+            logger.info(f"🧰 Perfil de recursos: {profile}")
+        else:
+            # Sem suporte neste driver: mantém o perfil da inicialização sem repetir a tentativa (e o aviso)
+            self.resource_switching = False
+            logger.info(f"🧰 Troca de perfil indisponível - mantendo '{self.resource_profile}' neste navegador")
+    
     def login(self, username, password):
         """Faz login no sistema ValSports"""
+        with tracing.span('login') as span, metrics.phase('login'):
+            success = self._login(username, password)
+            span.set_attribute('login.success', success)
+        if not success:
+            metrics.LOGIN_FAILURES.inc(endpoint=metrics.current_endpoint())
+        return success
+    
+    def _login(self, username, password):
+        """Fluxo de login: sessão salva ou formulário"""
         try:
             logger.info("Iniciando processo de login")
             
+            # Reaproveitar a sessão salva por outro driver, sem passar pelo formulário
+            if self.session_store and self.session_store.restore(self.driver, self.base_url, username, password):
+                self.is_logged_in = True
+                self.session_start_time = time.time()
+                return True
+            
             # 1. open on https://www.valsports.net/login
-            self.driver.get(f"{self.base_url}/login")
-            time.sleep(2)  # Mantido para login estável
+            readiness.navigate(self.driver, f"{self.base_url}/login")
             
-            # Aguardar carregamento da página
+            # Aguardar carregamento da página (o formulário só existe após o Vue montar)
             wait = WebDriverWait(self.driver, 15)
             
             # 2. click on css=.form-group:nth-child(1) > .form-control
@@ -85,7 +165,9 @@ class ValSportsScraper:
             # 5. click on css=.btn-success
             login_button = self.driver.find_element(By.CSS_SELECTOR, ".btn-success")
             login_button.click()
-            time.sleep(2)  # Mantido para login estável
+            
+            # Aguardar o redirecionamento após o login em vez de um tempo fixo
+            readiness.wait_for_url_without(self.driver, "login", timeout=10)
             
             # Verificar se o login foi bem-sucedido
             if "betsnow.net" in self.driver.current_url:
@@ -100,6 +182,9 @@ class ValSportsScraper:
             if self.base_url in self.driver.current_url or "dashboard" in self.driver.current_url.lower():
                 logger.info("Login realizado com sucesso")
                 self.is_logged_in = True
+                self.session_start_time = time.time()
+                if self.session_store:
+                    self.session_store.save(self.driver, username, password)
                 return True
             
             logger.warning("Login pode ter falhado - verificando URL atual")
@@ -112,69 +197,237 @@ class ValSportsScraper:
             logger.error(f"Erro durante o login: {str(e)}")
             return False
     
-    def scrape_bet_ticket(self, bet_code):
-        """Captura dados de um bilhete específico usando XPaths e CSS selectors específicos"""
-        try:
-            logger.info(f"🚀 INICIANDO EXTRAÇÃO DO BILHETE: {bet_code}")
-            logger.info(f"⏰ Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"🌐 URL Base: {self.base_url}")
+    def open_bet_page(self, bet_code):
+        """Navega até o bilhete e aguarda a renderização; retorna False se o login falhar"""
+        # Passo a passo só em DEBUG: o resumo por bilhete sai em _log_ticket_summary
+        logger.debug("🚀 Abrindo bilhete %s às %s (URL base: %s)", bet_code, time.strftime('%Y-%m-%d %H:%M:%S'), self.base_url)
 
-            import os
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-            if not os.path.exists('downloads'):
-                os.makedirs('downloads')
+        if not os.path.exists('logs'):
+            os.makedirs('logs')
+        if not os.path.exists('downloads'):
+            os.makedirs('downloads')
 
-            if not self.is_logged_in:
-                logger.warning("Não está logado, fazendo login primeiro")
-                username = os.environ.get('VALSORTS_USERNAME', 'cairovinicius')
-                password = os.environ.get('VALSORTS_PASSWORD', '279999')
-                if not self.login(username, password):
-                    return None
+        if not self.is_logged_in:
+            logger.warning("Não está logado, fazendo login primeiro")
+            username, password = get_credentials()
+            if not self.login(username, password):
+                return False
 
-            bet_url = f"{self.base_url}/prebet/{bet_code}"
-            logger.info(f"🌐 Navegando para: {bet_url}")
-            self.driver.get(bet_url)
-            
-            # Aguardar página carregar (otimizado agressivamente)
-            time.sleep(2)
+        self.use_resource_profile('capture')
+        bet_url = f"{self.base_url}/prebet/{bet_code}"
+        logger.debug("🌐 Navegando para: %s", bet_url)
+        readiness.navigate(self.driver, bet_url)
+        
+        with metrics.phase('container_wait'):
+            # Aguardar o app Vue montar
+            readiness.wait_for_vue_app(self.driver)
             
-            # Aguardar JavaScript carregar
-            wait = WebDriverWait(self.driver, 30)
+            # Aguardar o container do bilhete (o documento já está em DOMContentLoaded)
+            wait = WebDriverWait(self.driver, 30, poll_frequency=readiness.POLL_FREQUENCY)
             
             try:
                 # Aguardar container principal do bilhete
                 wait.until(EC.presence_of_element_located((By.XPATH, "//main/div[3]/div/div/div")))
-                logger.info("✅ Container do bilhete carregado")
+                logger.debug("✅ Container do bilhete carregado")
             except TimeoutException:
                 logger.warning("⚠️ Timeout aguardando container - continuando...")
             
-            # Aguardar mais um pouco para garantir (otimizado agressivamente)
-            time.sleep(1)
-            
-            # Salvar debug
-            current_url = self.driver.current_url
-            logger.info(f"📍 URL atual: {current_url}")
-            
-            # Salvar screenshot e HTML para debug
-            self.driver.save_screenshot(f"scraper_{bet_code}.png")
-            
-            with open(f"scraper_{bet_code}.html", "w", encoding="utf-8") as f:
-                f.write(self.driver.page_source)
-            
-            # Extrair dados usando XPaths e CSS selectors específicos
-            bet_data = self._extract_bet_data_with_selectors(bet_code)
-            
-            return bet_data
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao capturar bilhete: {str(e)}")
-            return None
+            # Aguardar a lista do bilhete terminar de renderizar
+            readiness.wait_for_stable_count(self.driver, ".l-item.d-block")
+        
+        logger.debug("📍 URL atual: %s", self.driver.current_url)
+        self.loaded_bet_code = bet_code
+        self.loaded_bet_at = time.time()
+        return True
+    
+    def _log_ticket_summary(self, bet_code, bet_data, extractor, start_time):
+        """Uma linha por bilhete no lugar do log por elemento"""
+        if not bet_data or not bet_data['games']:
+            logger.warning("🎫 %s: nenhum jogo extraído (%s, %.2fs)", bet_code, extractor, time.time() - start_time)
+            return
+        logger.info(
+            "🎫 %s: %d jogos, odds %s, prêmio %s (%s, %.2fs)",
+            bet_code, len(bet_data['games']), bet_data.get('total_odds') or '-',
+            bet_data.get('possible_prize') or '-', extractor, time.time() - start_time
+        )
+    
+    def _save_debug_artifacts(self, name, failed=False, html=None):
+        """Salva screenshot e HTML da página atual conforme o modo DEBUG_ARTIFACTS (em segundo plano)"""
+        debug_artifacts.capture(self.driver, name, failed=failed, html=html)
+    
+    def has_loaded_bet(self, bet_code):
+        """Indica se a aba principal ainda mostra este bilhete, carregado há pouco por open_bet_page"""
+        return (
+            self.loaded_bet_code == bet_code
+            and time.time() - self.loaded_bet_at < PREBET_REUSE_MAX_AGE
+            and f"/prebet/{bet_code}" in self.driver.current_url
+        )
+    
+    def scrape_bet_ticket(self, bet_code, reuse_page=False):
+        """Captura dados de um bilhete específico usando XPaths e CSS selectors específicos
+
+        Com `reuse_page`, extrai da página já aberta (ex.: após um snapshot) sem navegar de novo.
+        """
+        with tracing.span('scrape_bet_ticket', bet_code=bet_code) as span:
+            try:
+                start_time = time.time()
+                reused = reuse_page and self.has_loaded_bet(bet_code)
+                span.set_attribute('page.reused', reused)
+                if not reused and not self.open_bet_page(bet_code):
+                    return None
+                
+                # Extrair tudo em um único round-trip; heurísticas Python como fallback
+                extractor = 'js'
+                bet_data = self._extract_bet_data_with_js(bet_code)
+                if not bet_data or not bet_data['games']:
+                    logger.debug("Extração via JavaScript sem jogos, usando selectors específicos")
+                    extractor = 'selectors'
+                    bet_data = self._extract_bet_data_with_selectors(bet_code)
+                
+                span.set_attributes({'extractor': extractor, 'games': len(bet_data['games']) if bet_data else 0})
+                self._log_ticket_summary(bet_code, bet_data, extractor, start_time)
+                
+                # Salvar screenshot e HTML para debug (falhas ou amostra)
+                self._save_debug_artifacts(f"scraper_{bet_code}", failed=not bet_data or not bet_data['games'])
+                
+                return bet_data
+                
+            except Exception as e:
+                logger.error(f"❌ Erro ao capturar bilhete: {str(e)}")
+                span.record_error(e)
+                return None
+    
+    def snapshot_bet_ticket(self, bet_code):
+        """Carrega o bilhete e devolve o HTML renderizado para análise fora do navegador"""
+        with tracing.span('snapshot_bet_ticket', bet_code=bet_code) as span:
+            try:
+                if not self.open_bet_page(bet_code):
+                    return None
+                
+                with metrics.phase('extraction'):
+                    html = self.driver.page_source
+                    # Valores digitados nos inputs não aparecem no page_source
+                    inputs = self.driver.execute_script(
+                        "var b = document.querySelector(\"input[placeholder*='Apostador']\");"
+                        " var v = document.querySelector(\"input[placeholder*='Valor']\");"
+                        " return {bettor_name: b ? b.value : '', bet_value: v ? v.value : ''};"
+                    ) or {}
+                
+                span.set_attribute('html.length', len(html))
+                
+                # A falha da análise offline é registrada pela API, que conhece o resultado
+                self._save_debug_artifacts(f"scraper_{bet_code}", html=html)
+                
+                return {
+                    'bet_code': bet_code,
+                    'html': html,
+                    'bettor_name': inputs.get('bettor_name', ''),
+                    'bet_value': inputs.get('bet_value', '')
+                }
+                
+            except Exception as e:
+                logger.error(f"❌ Erro ao capturar snapshot do bilhete: {str(e)}")
+                span.record_error(e)
+                return None
+    
+    def scrape_bet_tickets(self, bet_codes, max_tabs, on_ticket=None):
+        """Captura vários bilhetes em abas do mesmo navegador logado
+
+        Até `max_tabs` abas (SCRAPER_TABS no app.py) carregam em paralelo e a
+        extração é feita aba por aba. `on_ticket(driver, bet_code)` roda na aba de
+        cada bilhete extraído com jogos, antes de fechá-la (ex.: para a captura HTTP
+        aprender sessão e URL do backend). Retorna {bet_code: bet_data ou None}.
+        """
+        max_tabs = max(1, max_tabs)
+        results = {}
+
+        if not self.is_logged_in:
+            username, password = get_credentials()
+            if not self.login(username, password):
+                return {bet_code: None for bet_code in bet_codes}
+
+        self.use_resource_profile('capture')
+        main_handle = self.driver.current_window_handle
+        for index in range(0, len(bet_codes), max_tabs):
+            chunk = bet_codes[index:index + max_tabs]
+            start_time = time.time()
+            tabs = {}
+
+            # Abrir uma aba por bilhete; a navegação via location não bloqueia como driver.get
+            for bet_code in chunk:
+                try:
+                    self.driver.switch_to.new_window('tab')
+                    self.driver.execute_script("window.location.href = arguments[0];", f"{self.base_url}/prebet/{bet_code}")
+                    tabs[bet_code] = self.driver.current_window_handle
+                except Exception as e:
+                    logger.error(f"❌ Erro ao abrir aba do bilhete {bet_code}: {str(e)}")
+                    results[bet_code] = None
+                    # A aba pode ter sido aberta antes da falha: fechá-la e voltar à principal
+                    try:
+                        if self.driver.current_window_handle != main_handle:
+                            self.driver.close()
+                        self.driver.switch_to.window(main_handle)
+                    except Exception:
+                        pass
+
+            # Extrair aba por aba (as demais continuam carregando em segundo plano)
+            for bet_code, handle in tabs.items():
+                try:
+                    self.driver.switch_to.window(handle)
+                    with metrics.phase('container_wait'):
+                        readiness.wait_for_vue_app(self.driver)
+                        readiness.wait_for_stable_count(self.driver, ".l-item.d-block")
+
+                    extractor = 'js'
+                    bet_data = self._extract_bet_data_with_js(bet_code)
+                    if not bet_data or not bet_data['games']:
+                        extractor = 'selectors'
+                        bet_data = self._extract_bet_data_with_selectors(bet_code)
+                    self._log_ticket_summary(bet_code, bet_data, extractor, start_time)
+                    results[bet_code] = bet_data
+                    self._save_debug_artifacts(f"scraper_{bet_code}", failed=not bet_data or not bet_data['games'])
+                    if on_ticket and bet_data and bet_data['games']:
+                        try:
+                            on_ticket(self.driver, bet_code)
+                        except Exception as e:
+                            logger.warning(f"⚠️ on_ticket falhou para {bet_code}: {str(e)}")
+                except Exception as e:
+                    logger.error(f"❌ Erro ao capturar bilhete {bet_code} na aba: {str(e)}")
+                    results[bet_code] = None
+                finally:
+                    try:
+                        self.driver.close()
+                    except Exception:
+                        pass
+
+            self.driver.switch_to.window(main_handle)
+            logger.info(f"🗂️ {len(chunk)} bilhetes capturados em abas em {time.time() - start_time:.2f}s")
+
+        return results
+
+    def _extract_bet_data_with_js(self, bet_code):
+        """Extrai dados do bilhete com um único execute_script no navegador"""
+        start_time = time.time()
+        with tracing.span('_extract_bet_data_with_js', bet_code=bet_code) as span, metrics.phase('extraction'):
+            bet_data = js_extractor.extract_ticket(self.driver, bet_code)
+            span.set_attribute('games', len(bet_data['games']) if bet_data else 0)
+        if bet_data:
+            logger.debug("⚡ Extração via JavaScript: %s jogos em %.0fms", len(bet_data['games']), (time.time() - start_time) * 1000)
+        return bet_data
     
     def _extract_bet_data_with_selectors(self, bet_code):
         """Extrai dados usando XPaths e CSS selectors específicos"""
+        # Amostra de bilhetes com o passo a passo da extração visível em INFO
+        self.detail_level = logging.INFO if random.random() < LOG_VERBOSE_SAMPLE_RATE else logging.DEBUG
+        with tracing.span('_extract_bet_data_with_selectors', bet_code=bet_code) as span, metrics.phase('extraction'):
+            bet_data = self._extract_bet_data_with_selectors_impl(bet_code)
+            span.set_attribute('games', len(bet_data['games']) if bet_data else 0)
+            return bet_data
+    
+    def _extract_bet_data_with_selectors_impl(self, bet_code):
+        """Implementação da extração por XPaths e CSS selectors"""
         try:
-            logger.info("🔍 Extraindo dados com selectors específicos...")
+            logger.log(self.detail_level, "🔍 Extraindo dados com selectors específicos...")
             
             # Estrutura base dos dados
             bet_data = {
@@ -192,32 +445,32 @@ class ValSportsScraper:
                 # Procurar por span com classe "text-theme ml-2" que contém o número
                 games_count_element = self.driver.find_element(By.CSS_SELECTOR, "span.text-theme.ml-2")
                 games_text = games_count_element.text.strip()
-                logger.info(f"📊 Texto do contador: {games_text}")
+                logger.log(self.detail_level, "📊 Texto do contador: %s", games_text)
                 
                 # Extrair número do texto
                 count_match = re.search(r'(\d+)', games_text)
                 if count_match:
                     bet_data['total_games'] = int(count_match.group(1))
-                    logger.info(f"🎮 Total de jogos: {bet_data['total_games']}")
+                    logger.log(self.detail_level, "🎮 Total de jogos: %s", bet_data['total_games'])
             except Exception as e:
-                logger.warning(f"⚠️ Erro ao extrair contador de jogos: {str(e)}")
+                logger.log(self.detail_level, "⚠️ Erro ao extrair contador de jogos: %s", e)
             
             # 2. Extrair total das odds
             try:
                 total_odds_element = self.driver.find_element(By.XPATH, "//main/div[3]/div/div[2]/div/div/div/div[2]")
                 bet_data['total_odds'] = total_odds_element.text.strip()
-                logger.info(f"💰 Total odds: {bet_data['total_odds']}")
+                logger.log(self.detail_level, "💰 Total odds: %s", bet_data['total_odds'])
             except Exception as e:
-                logger.warning(f"⚠️ Erro ao extrair total odds: {str(e)}")
+                logger.log(self.detail_level, "⚠️ Erro ao extrair total odds: %s", e)
             
             # 3. Extrair possível prêmio "R$ 1.000.000,00"
             try:
                 # Procurar por div que contém "R$" e o valor do prêmio
                 possible_prize_element = self.driver.find_element(By.XPATH, "//div[contains(text(), 'R$')]")
                 bet_data['possible_prize'] = possible_prize_element.text.strip()
-                logger.info(f"🏆 Possível prêmio: {bet_data['possible_prize']}")
+                logger.log(self.detail_level, "🏆 Possível prêmio: %s", bet_data['possible_prize'])
             except Exception as e:
-                logger.warning(f"⚠️ Erro ao extrair possível prêmio: {str(e)}")
+                logger.log(self.detail_level, "⚠️ Erro ao extrair possível prêmio: %s", e)
             
             # 4. Extrair nome do apostador e valor - usar placeholders específicos
             try:
@@ -225,15 +478,15 @@ class ValSportsScraper:
                 apostador_inputs = self.driver.find_elements(By.XPATH, "//input[contains(@placeholder, 'Apostador')]")
                 if apostador_inputs:
                     bet_data['bettor_name'] = apostador_inputs[0].get_attribute("value")
-                    logger.info(f"👤 Apostador: {bet_data['bettor_name']}")
+                    logger.log(self.detail_level, "👤 Apostador: %s", bet_data['bettor_name'])
                 
                 # Procurar por placeholder "Valor"
                 valor_inputs = self.driver.find_elements(By.XPATH, "//input[contains(@placeholder, 'Valor')]")
                 if valor_inputs:
                     bet_data['bet_value'] = valor_inputs[0].get_attribute("value")
-                    logger.info(f"💵 Valor: {bet_data['bet_value']}")
+                    logger.log(self.detail_level, "💵 Valor: %s", bet_data['bet_value'])
             except Exception as e:
-                logger.warning(f"⚠️ Erro ao extrair campos do apostador: {str(e)}")
+                logger.log(self.detail_level, "⚠️ Erro ao extrair campos do apostador: %s", e)
             
             # 6. Extrair jogos usando seletores corretos baseados no HTML real
             games = self._extract_games_with_real_selectors()
@@ -243,12 +496,12 @@ class ValSportsScraper:
             if bet_data['total_games'] == 0:
                 bet_data['total_games'] = len(games)
             
-            logger.info(f"🎮 Total de jogos extraídos: {len(games)}")
+            logger.log(self.detail_level, "🎮 Total de jogos extraídos: %s", len(games))
             
             return bet_data
             
         except Exception as e:
-            logger.error(f"❌ Erro ao extrair dados: {str(e)}")
+            logger.error("❌ Erro ao extrair dados: %s", e)
             return None
     
     def _extract_games_dynamically(self):
@@ -256,22 +509,22 @@ class ValSportsScraper:
         games = []
         
         try:
-            logger.info("🎯 Extraindo jogos dinamicamente...")
+            logger.log(self.detail_level, "🎯 Extraindo jogos dinamicamente...")
             
-            # Aguardar um pouco para garantir que a página está carregada (otimizado agressivamente)
-            time.sleep(1)
+            # Aguardar a quantidade de jogos estabilizar
+            readiness.wait_for_stable_count(self.driver, ".l-item", settle_time=0.2)
             
             # Encontrar todos os elementos .l-item (jogos)
             game_elements = self.driver.find_elements(By.CSS_SELECTOR, ".l-item")
             
-            logger.info(f"🔍 Encontrados {len(game_elements)} elementos .l-item")
+            logger.log(self.detail_level, "🔍 Encontrados %s elementos .l-item", len(game_elements))
             
             # Processar apenas os primeiros 15 elementos (ou o número especificado)
             max_games = min(15, len(game_elements))
             
             for i in range(max_games):
                 try:
-                    logger.info(f"🎮 Processando jogo {i+1}...")
+                    logger.log(self.detail_level, "🎮 Processando jogo %s...", i+1)
                     
                     # Recarregar o elemento para evitar stale reference
                     game_elements = self.driver.find_elements(By.CSS_SELECTOR, ".l-item")
@@ -282,7 +535,7 @@ class ValSportsScraper:
                     
                     # Capturar texto completo primeiro
                     full_text = game_element.text
-                    logger.info(f"   📝 Texto completo do jogo {i+1}: {full_text[:100]}...")
+                    logger.log(self.detail_level, "   📝 Texto completo do jogo %s: %s...", i+1, full_text[:100])
                     
                     game_data = {
                         'game_number': i+1,
@@ -300,18 +553,18 @@ class ValSportsScraper:
                         lines = full_text.split('\n')
                         if lines:
                             game_data['league'] = lines[0].strip()
-                            logger.info(f"   Liga: {game_data['league']}")
+                            logger.log(self.detail_level, "   Liga: %s", game_data['league'])
                     except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao extrair liga: {str(e)}")
+                        logger.log(self.detail_level, "   ⚠️ Erro ao extrair liga: %s", e)
                     
                     try:
                         # Extrair data/hora
                         datetime_match = re.search(r'(\d{2}/\d{2}\s+\d{2}:\d{2})', full_text)
                         if datetime_match:
                             game_data['datetime'] = datetime_match.group(1)
-                            logger.info(f"   Data/Hora: {game_data['datetime']}")
+                            logger.log(self.detail_level, "   Data/Hora: %s", game_data['datetime'])
                     except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao extrair data/hora: {str(e)}")
+                        logger.log(self.detail_level, "   ⚠️ Erro ao extrair data/hora: %s", e)
                     
                     try:
                         # Extrair times - procurar por padrões mais específicos
@@ -331,7 +584,7 @@ class ValSportsScraper:
                                     if len(parts) == 2:
                                         game_data['home_team'] = parts[0].strip()
                                         game_data['away_team'] = parts[1].strip()
-                                        logger.info(f"   Times: {game_data['home_team']} x {game_data['away_team']}")
+                                        logger.log(self.detail_level, "   Times: %s x %s", game_data['home_team'], game_data['away_team'])
                                         break
                         
                         # Se não encontrou, tentar regex mais flexível
@@ -340,9 +593,9 @@ class ValSportsScraper:
                             if teams_match:
                                 game_data['home_team'] = teams_match.group(1).strip()
                                 game_data['away_team'] = teams_match.group(2).strip()
-                                logger.info(f"   Times (regex): {game_data['home_team']} x {game_data['away_team']}")
+                                logger.log(self.detail_level, "   Times (regex): %s x %s", game_data['home_team'], game_data['away_team'])
                     except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao extrair times: {str(e)}")
+                        logger.log(self.detail_level, "   ⚠️ Erro ao extrair times: %s", e)
                     
                     try:
                         # Extrair seleção (padrão: "Vencedor: Time" ou "Empate")
@@ -352,18 +605,18 @@ class ValSportsScraper:
                                 game_data['selection'] = f"Vencedor: {selection_match.group(1).strip()}"
                         elif 'Empate' in full_text:
                             game_data['selection'] = "Empate"
-                        logger.info(f"   Seleção: {game_data['selection']}")
+                        logger.log(self.detail_level, "   Seleção: %s", game_data['selection'])
                     except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao extrair seleção: {str(e)}")
+                        logger.log(self.detail_level, "   ⚠️ Erro ao extrair seleção: %s", e)
                     
                     try:
                         # Extrair odds (padrão: número decimal)
                         odds_match = re.search(r'\b(\d+\.\d+)\b', full_text)
                         if odds_match:
                             game_data['odds'] = odds_match.group(1)
-                            logger.info(f"   Odds: {game_data['odds']}")
+                            logger.log(self.detail_level, "   Odds: %s", game_data['odds'])
                     except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao extrair odds: {str(e)}")
+                        logger.log(self.detail_level, "   ⚠️ Erro ao extrair odds: %s", e)
                     
                     # Validar se tem dados mínimos (odds e seleção são obrigatórios)
                     if game_data['odds'] and game_data['selection']:
@@ -374,18 +627,18 @@ class ValSportsScraper:
                             game_data['teams'] = "Times não identificados"
                         
                         games.append(game_data)
-                        logger.info(f"   ✅ Jogo {i+1} adicionado")
+                        logger.log(self.detail_level, "   ✅ Jogo %s adicionado", i+1)
                     else:
-                        logger.warning(f"   ⚠️ Jogo {i+1} sem dados suficientes - ignorando")
+                        logger.log(self.detail_level, "   ⚠️ Jogo %s sem dados suficientes - ignorando", i+1)
                 
                 except Exception as e:
-                    logger.error(f"   ❌ Erro ao processar jogo {i+1}: {str(e)}")
+                    logger.error("   ❌ Erro ao processar jogo %s: %s", i+1, e)
                     continue
             
-            logger.info(f"🎮 Total de jogos válidos extraídos: {len(games)}")
+            logger.log(self.detail_level, "🎮 Total de jogos válidos extraídos: %s", len(games))
             
         except Exception as e:
-            logger.error(f"❌ Erro na extração dinâmica: {str(e)}")
+            logger.error("❌ Erro na extração dinâmica: %s", e)
         
         return games
     
@@ -394,30 +647,30 @@ class ValSportsScraper:
         games = []
         
         try:
-            logger.info("🎯 Extraindo jogos com seletores reais (MÚLTIPLAS APOSTAS)...")
+            logger.log(self.detail_level, "🎯 Extraindo jogos com seletores reais (MÚLTIPLAS APOSTAS)...")
             
-            # Aguardar menos tempo para carregamento (otimizado agressivamente)
-            time.sleep(0.5)
+            # Aguardar a quantidade de jogos estabilizar
+            readiness.wait_for_stable_count(self.driver, ".l-item.d-block", settle_time=0.2)
             
             # PRIMEIRO: Tentar extrair do bilhete lateral (bet slip)
             games = self._extract_games_from_bet_slip()
             if games:
-                logger.info(f"✅ Extraídos {len(games)} jogos do bilhete lateral")
+                logger.log(self.detail_level, "✅ Extraídos %s jogos do bilhete lateral", len(games))
                 return games
             
             # SEGUNDO: Se não encontrou no bilhete lateral, tentar área principal
-            logger.info("⚠️ Bilhete lateral não encontrado, tentando área principal...")
+            logger.log(self.detail_level, "⚠️ Bilhete lateral não encontrado, tentando área principal...")
             
             # Encontrar todos os elementos .l-item (jogos) que têm a classe d-block
             game_elements = self.driver.find_elements(By.CSS_SELECTOR, ".l-item.d-block")
             
-            logger.info(f"🔍 Encontrados {len(game_elements)} elementos .l-item.d-block")
+            logger.log(self.detail_level, "🔍 Encontrados %s elementos .l-item.d-block", len(game_elements))
             
             # Pular os primeiros 10 elementos (são elementos de navegação)
             start_index = 10
             valid_games = game_elements[start_index:]
             
-            logger.info(f"🎮 Processando {len(valid_games)} jogos válidos (pulando primeiros {start_index})")
+            logger.log(self.detail_level, "🎮 Processando %s jogos válidos (pulando primeiros %s)", len(valid_games), start_index)
             
             current_game = None
             game_counter = 0
@@ -504,7 +757,7 @@ class ValSportsScraper:
                     if has_league and has_teams and is_unique_game:
                         # É um novo jogo
                         game_counter += 1
-                        logger.info(f"🎮 Processando NOVO JOGO {game_counter}...")
+                        logger.log(self.detail_level, "🎮 Processando NOVO JOGO %s...", game_counter)
                         
                         # Extrair dados básicos do jogo
                         current_game = {
@@ -517,7 +770,7 @@ class ValSportsScraper:
                             lines = full_text.split('\n')
                             if lines:
                                 current_game['league'] = lines[0].strip()
-                                logger.info(f"   Liga: {current_game['league']}")
+                                logger.log(self.detail_level, "   Liga: %s", current_game['league'])
                         except Exception as e: pass
                         
                         try:
@@ -525,7 +778,7 @@ class ValSportsScraper:
                             datetime_match = re.search(r'(\d{2}/\d{2}\s+\d{2}:\d{2})', full_text)
                             if datetime_match:
                                 current_game['datetime'] = datetime_match.group(1)
-                                logger.info(f"   Data/Hora: {current_game['datetime']}")
+                                logger.log(self.detail_level, "   Data/Hora: %s", current_game['datetime'])
                         except Exception as e: pass
                         
                         try:
@@ -550,7 +803,7 @@ class ValSportsScraper:
                                             current_game['home_team'] = home_team
                                             current_game['away_team'] = away_team
                                             current_game['teams'] = f"{home_team} x {away_team}"
-                                            logger.info(f"   Times: {current_game['teams']}")
+                                            logger.log(self.detail_level, "   Times: %s", current_game['teams'])
                                             break
                                 
                                 # Procurar por times em linhas consecutivas (formato novo)
@@ -575,10 +828,10 @@ class ValSportsScraper:
                                             current_game['home_team'] = home_team
                                             current_game['away_team'] = away_team
                                             current_game['teams'] = f"{home_team} x {away_team}"
-                                            logger.info(f"   Times: {current_game['teams']}")
+                                            logger.log(self.detail_level, "   Times: %s", current_game['teams'])
                                             break
                         except Exception as e: 
-                            logger.warning(f"   ⚠️ Erro ao extrair times: {str(e)}")
+                            logger.log(self.detail_level, "   ⚠️ Erro ao extrair times: %s", e)
                     
                     # Extrair TODAS as apostas do elemento
                     if current_game:
@@ -608,23 +861,23 @@ class ValSportsScraper:
                                     if selection and odds:
                                         game_entry['selections'].append(selection)
                                         game_entry['odds_list'].append(odds)
-                                        logger.info(f"   ✅ Aposta {len(game_entry['selections'])} do Jogo {game_counter}: {selection} - {odds}")
+                                        logger.log(self.detail_level, "   ✅ Aposta %s do Jogo %s: %s - %s", len(game_entry['selections']), game_counter, selection, odds)
                                 
                                 games.append(game_entry)
                             else:
-                                logger.warning(f"   ⚠️ Não conseguiu extrair seleções/odds do texto")
+                                logger.log(self.detail_level, "   ⚠️ Não conseguiu extrair seleções/odds do texto")
                                 
                         except Exception as e:
-                            logger.warning(f"   ⚠️ Erro ao extrair apostas: {str(e)}")
+                            logger.log(self.detail_level, "   ⚠️ Erro ao extrair apostas: %s", e)
                 
                 except Exception as e:
-                    logger.error(f"   ❌ Erro ao processar jogo {i}: {str(e)}")
+                    logger.error("   ❌ Erro ao processar jogo %s: %s", i, e)
                     continue
             
-            logger.info(f"🎮 Total de apostas extraídas: {len(games)}")
+            logger.log(self.detail_level, "🎮 Total de apostas extraídas: %s", len(games))
             
         except Exception as e:
-            logger.error(f"❌ Erro na extração com seletores reais: {str(e)}")
+            logger.error("❌ Erro na extração com seletores reais: %s", e)
         
         return games
     
@@ -633,7 +886,7 @@ class ValSportsScraper:
         games = []
         
         try:
-            logger.info("🎯 Extraindo jogos do bilhete lateral (bet slip)...")
+            logger.log(self.detail_level, "🎯 Extraindo jogos do bilhete lateral (bet slip)...")
             
             # Procurar por elementos do bilhete lateral
             # Baseado na imagem, o bilhete está no lado direito com "BILHETE 5"
@@ -651,7 +904,8 @@ class ValSportsScraper:
             ]
             
             bet_slip_element = None
-            for selector in bet_slip_selectors:
+            ranked_selectors = selector_registry.ordered('extract.bet_slip', bet_slip_selectors)
+            for tried, selector in enumerate(ranked_selectors, 1):
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     for element in elements:
@@ -659,7 +913,8 @@ class ValSportsScraper:
                         text = element.text
                         if any(keyword in text for keyword in ['BILHETE', 'Total odds', 'Possível prêmio', 'Felipe', '111,88', '223,76']):
                             bet_slip_element = element
-                            logger.info(f"✅ Bilhete lateral encontrado com seletor: {selector}")
+                            selector_registry.record('extract.bet_slip', selector, ranked_selectors[:tried])
+                            logger.log(self.detail_level, "✅ Bilhete lateral encontrado com seletor: %s", selector)
                             break
                     if bet_slip_element:
                         break
@@ -672,7 +927,7 @@ class ValSportsScraper:
             
             # Extrair texto completo do bilhete
             bet_slip_text = bet_slip_element.text
-            logger.info(f"📝 Texto do bilhete lateral: {bet_slip_text[:200]}...")
+            logger.log(self.detail_level, "📝 Texto do bilhete lateral: %s...", bet_slip_text[:200])
             
             # Procurar por jogos no texto do bilhete
             lines = bet_slip_text.split('\n')
@@ -683,7 +938,7 @@ class ValSportsScraper:
             
             while i < len(lines):
                 line = lines[i].strip()
-                logger.info(f"   Linha {i}: '{line}'")
+                logger.log(self.detail_level, "   Linha %s: '%s'", i, line)
                 
                 # Pular linhas vazias ou de cabeçalho
                 if (not line or 
@@ -738,432 +993,62 @@ class ValSportsScraper:
                                     'odds': odds
                                 }
                                 games.append(game)
-                                logger.info(f"🎮 Jogo {game_counter}: {game['teams']}")
-                                logger.info(f"   Liga: {league}")
-                                logger.info(f"   Data/Hora: {datetime_str}")
-                                logger.info(f"   Seleção: {selection}")
-                                logger.info(f"   Odds: {odds}")
-                                logger.info(f"   ✅ Jogo {game_counter} adicionado ao bilhete")
+                                logger.log(self.detail_level, "🎮 Jogo %s: %s", game_counter, game['teams'])
+                                logger.log(self.detail_level, "   Liga: %s", league)
+                                logger.log(self.detail_level, "   Data/Hora: %s", datetime_str)
+                                logger.log(self.detail_level, "   Seleção: %s", selection)
+                                logger.log(self.detail_level, "   Odds: %s", odds)
+                                logger.log(self.detail_level, "   ✅ Jogo %s adicionado ao bilhete", game_counter)
                             else:
-                                logger.warning(f"⚠️ Dados insuficientes para jogo na linha {i}")
+                                logger.log(self.detail_level, "⚠️ Dados insuficientes para jogo na linha %s", i)
                         else:
-                            logger.warning(f"⚠️ Times não encontrados após liga na linha {i}")
+                            logger.log(self.detail_level, "⚠️ Times não encontrados após liga na linha %s", i)
                     else:
-                        logger.warning(f"⚠️ Data/hora não encontrada após liga na linha {i}")
+                        logger.log(self.detail_level, "⚠️ Data/hora não encontrada após liga na linha %s", i)
                 else:
                     i += 1
             
-            logger.info(f"🎮 Total de jogos extraídos do bilhete lateral: {len(games)}")
+            logger.log(self.detail_level, "🎮 Total de jogos extraídos do bilhete lateral: %s", len(games))
             
         except Exception as e:
-            logger.error(f"❌ Erro ao extrair jogos do bilhete lateral: {str(e)}")
+            logger.error("❌ Erro ao extrair jogos do bilhete lateral: %s", e)
         
         return games
     
     def confirm_bet(self, bet_code):
         """Confirma a aposta no sistema - VERSÃO OTIMIZADA"""
+        with tracing.span('confirm_bet', bet_code=bet_code) as span:
+            confirmed = self._confirm_bet(bet_code)
+            span.set_attribute('confirm.success', confirmed)
+            if self.last_verification:
+                span.set_attributes({
+                    'confirm.status': self.last_verification['status'],
+                    'confirm.evidence': self.last_verification['source']
+                })
+            return confirmed
+    
+    def _confirm_bet(self, bet_code):
+        """Fluxo de confirmação: máquina de estados guiada pelos modais (ver ConfirmEngine)"""
+        self.last_verification = None
         try:
             if not self.is_logged_in:
                 logger.error("❌ Usuário não está logado")
                 return False
             
             logger.info(f"✅ Confirmando aposta: {bet_code}")
-            
-            # Navegar para a página principal primeiro
-            logger.info(f"🌐 Navegando para página principal: {self.base_url}")
-            self.driver.get(self.base_url)
-            time.sleep(1)  # Reduzido de 2 para 1 segundo
-            
-            # Aguardar carregamento com timeout reduzido
-            wait = WebDriverWait(self.driver, 10)  # Reduzido de 20 para 10 segundos
-            
-            # Clicar na aba PRÉ-APOSTA - OTIMIZADO
-            logger.info("🔍 Procurando aba PRÉ-APOSTA...")
-            # Usar apenas os seletores mais comuns primeiro
-            prebet_tab_selectors = [
-                "//a[contains(text(), 'Pré-aposta')]",  # Mais comum
-                "//a[contains(text(), 'PRÉ-APOSTA')]",
-                "//a[contains(@href, '/prebet')]"
-            ]
-            
-            prebet_tab = None
-            for selector in prebet_tab_selectors:
-                try:
-                    prebet_tab = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    logger.info(f"✅ Aba PRÉ-APOSTA encontrada com seletor: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not prebet_tab:
-                logger.error("❌ Aba PRÉ-APOSTA não encontrada")
-                self.driver.save_screenshot(f"prebet_tab_not_found_{bet_code}.png")
-                return False
-            
-            # Clicar na aba PRÉ-APOSTA (abre o modal) - OTIMIZADO
-            logger.info("🖱️ Clicando na aba PRÉ-APOSTA...")
-            try:
-                prebet_tab.click()
-                logger.info("✅ Clique na aba PRÉ-APOSTA realizado")
-            except Exception as click_error:
-                logger.warning(f"⚠️ Clique normal falhou, tentando JavaScript: {click_error}")
-                self.driver.execute_script("arguments[0].click();", prebet_tab)
-                logger.info("✅ Clique via JavaScript na aba PRÉ-APOSTA realizado")
-            
-            time.sleep(1)  # Reduzido de 2 para 1 segundo
-            
-            # Aguardar o modal aparecer - OTIMIZADO
-            logger.info("🔍 Aguardando modal de pré-aposta aparecer...")
-            try:
-                # Aguardar o modal estar visível com timeout reduzido
-                wait_modal = WebDriverWait(self.driver, 5)  # Timeout reduzido
-                wait_modal.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".v-dialog.active")))
-                logger.info("✅ Modal de pré-aposta detectado")
-                time.sleep(0.5)  # Reduzido de 1 para 0.5 segundos
-            except:
-                logger.warning("⚠️ Modal não detectado, continuando...")
-            
-            # Procurar especificamente o campo v-dialog-input - OTIMIZADO
-            logger.info("🔍 Procurando campo v-dialog-input...")
-            bet_code_input = None
-            try:
-                # Usar timeout reduzido para o campo
-                wait_input = WebDriverWait(self.driver, 5)
-                bet_code_input = wait_input.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".v-dialog-input")))
-                logger.info("✅ Campo v-dialog-input encontrado")
-            except:
-                logger.warning("⚠️ Campo v-dialog-input não encontrado, tentando alternativas...")
-                # Tentar apenas os seletores mais comuns
-                alternative_selectors = [
-                    "input.v-dialog-input",
-                    "//input[@class='v-dialog-input']",
-                    "//div[contains(@class, 'v-dialog')]//input[@type='text']"
-                ]
-                
-                for selector in alternative_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            bet_code_input = wait_input.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        else:
-                            bet_code_input = wait_input.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        logger.info(f"✅ Campo encontrado com seletor alternativo: {selector}")
-                        break
-                    except:
-                        continue
-            
-            if not bet_code_input:
-                logger.error("❌ Campo para código do bilhete no modal não encontrado")
-                self.driver.save_screenshot(f"modal_input_not_found_{bet_code}.png")
-                return False
-            
-            # Inserir código do bilhete no modal - OTIMIZADO
-            logger.info(f"📝 Inserindo código do bilhete no modal: {bet_code}")
-            bet_code_input.clear()
-            bet_code_input.send_keys(bet_code)
-            time.sleep(0.5)  # Reduzido de 1 para 0.5 segundos
-            
-            # Procurar botão "BUSCAR" no modal - OTIMIZADO
-            logger.info("🔍 Procurando botão BUSCAR no modal...")
-            # Usar apenas os seletores mais comuns
-            buscar_button_selectors = [
-                ".v-dialog-btn.success",  # Mais comum
-                "a.v-dialog-btn.success",
-                "//a[contains(text(), 'Buscar')]"
-            ]
-            
-            buscar_button = None
-            for selector in buscar_button_selectors:
-                try:
-                    if selector.startswith("//"):
-                        buscar_button = wait_input.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        buscar_button = wait_input.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    logger.info(f"✅ Botão BUSCAR encontrado com seletor: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not buscar_button:
-                logger.error("❌ Botão BUSCAR no modal não encontrado")
-                self.driver.save_screenshot(f"buscar_button_not_found_{bet_code}.png")
-                return False
-            
-            # Clicar no botão BUSCAR - OTIMIZADO
-            logger.info("🖱️ Clicando no botão BUSCAR...")
-            try:
-                buscar_button.click()
-                logger.info("✅ Clique no botão BUSCAR realizado")
-            except Exception as click_error:
-                logger.warning(f"⚠️ Clique normal falhou, tentando JavaScript: {click_error}")
-                self.driver.execute_script("arguments[0].click();", buscar_button)
-                logger.info("✅ Clique via JavaScript no botão BUSCAR realizado")
-            
-            # Aguardar o modal fechar e o bilhete carregar - OTIMIZADO
-            time.sleep(2)  # Reduzido de 3 para 2 segundos
-            
-            # Verificar se a página carregou corretamente
-            try:
-                # Procurar por vários seletores possíveis do botão de confirmação
-                confirm_button = None
-                possible_selectors = [
-                    ".btn-group > .text-style",
-                    ".btn.text-style",
-                    "button[type='button'].btn.text-style",
-                    ".btn-group button",
-                    "//button[contains(text(), 'Apostar')]",
-                    "//a[contains(text(), 'Apostar')]",
-                    "//button[contains(text(), 'Confirmar')]",
-                    "//a[contains(text(), 'Confirmar')]"
-                ]
-                
-                for selector in possible_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            confirm_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        else:
-                            confirm_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        logger.info(f"✅ Botão de confirmação encontrado com seletor: {selector}")
-                        break
-                    except:
-                        continue
-                
-                if not confirm_button:
-                    logger.error("❌ Botão de confirmação não encontrado")
-                    self.driver.save_screenshot(f"confirm_button_not_found_{bet_code}.png")
-                    return False
-                
-                # Scroll para o elemento se necessário
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", confirm_button)
-                time.sleep(0.5)  # Otimizado agressivamente
-                
-                # Tentar clicar
-                try:
-                    confirm_button.click()
-                    logger.info("✅ Clique no botão de confirmação realizado")
-                except Exception as click_error:
-                    logger.warning(f"⚠️ Clique normal falhou, tentando JavaScript: {click_error}")
-                    self.driver.execute_script("arguments[0].click();", confirm_button)
-                    logger.info("✅ Clique via JavaScript realizado")
-                
-                time.sleep(2)  # Otimizado agressivamente
-                
-                # Procurar pelo botão "Sim" para confirmar
-                yes_button = None
-                yes_selectors = [
-                    "//a[contains(text(),'Sim')]",
-                    "//button[contains(text(),'Sim')]", 
-                    "//a[contains(text(),'SIM')]",
-                    "//button[contains(text(),'SIM')]",
-                    ".btn-success",
-                    ".btn[data-dismiss='modal']",
-                    "//button[contains(@class, 'btn-success')]",
-                    "//a[contains(@class, 'btn-success')]"
-                ]
-                
-                for selector in yes_selectors:
-                    try:
-                        yes_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        logger.info(f"✅ Botão 'Sim' encontrado com seletor: {selector}")
-                        break
-                    except:
-                        continue
-                
-                # Se não encontrou, procurar por pop-ups de mudança de odds
-                if not yes_button:
-                    logger.info("🔍 Procurando por pop-ups de mudança de odds...")
-                    try:
-                        # Seletores específicos para o pop-up de mudança de odds
-                        popup_selectors = [
-                            # Seletores específicos fornecidos pelo usuário
-                            "/html/body/div[3]/div/div[2]/div[3]/a[2]",  # XPath específico
-                            "a.v-dialog-btn:nth-child(2)",  # CSS específico
-                            # Seletores genéricos para pop-ups
-                            "//div[contains(text(), 'Deseja continuar?')]//following-sibling::*//button[contains(text(), 'SIM')]",
-                            "//div[contains(text(), 'Deseja continuar?')]//following-sibling::*//a[contains(text(), 'SIM')]",
-                            "//div[contains(text(), 'Mudança de prêmio')]//following-sibling::*//button[contains(text(), 'SIM')]",
-                            "//div[contains(text(), 'Mudança de prêmio')]//following-sibling::*//a[contains(text(), 'SIM')]",
-                            "//button[contains(text(), 'SIM') and contains(@class, 'btn-success')]",
-                            "//a[contains(text(), 'SIM') and contains(@class, 'btn-success')]",
-                            "//button[contains(text(), 'SIM')]",
-                            "//a[contains(text(), 'SIM')]",
-                            "//button[contains(text(), 'Sim')]",
-                            "//a[contains(text(), 'Sim')]"
-                        ]
-                        
-                        for selector in popup_selectors:
-                            try:
-                                if selector.startswith("/"):
-                                    # XPath
-                                    yes_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                                else:
-                                    # CSS
-                                    yes_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                                logger.info(f"✅ Botão 'SIM' do pop-up encontrado com seletor: {selector}")
-                                break
-                            except:
-                                continue
-                        
-                        # Se ainda não encontrou, tentar procurar por qualquer botão verde
-                        if not yes_button:
-                            logger.info("🔍 Procurando por qualquer botão verde...")
-                            green_button_selectors = [
-                                "//button[contains(@class, 'btn-success')]",
-                                "//a[contains(@class, 'btn-success')]",
-                                "//button[contains(@style, 'green')]",
-                                "//a[contains(@style, 'green')]"
-                            ]
-                            
-                            for selector in green_button_selectors:
-                                try:
-                                    buttons = self.driver.find_elements(By.XPATH, selector)
-                                    for button in buttons:
-                                        if button.is_displayed() and button.is_enabled():
-                                            yes_button = button
-                                            logger.info(f"✅ Botão verde encontrado com seletor: {selector}")
-                                            break
-                                    if yes_button:
-                                        break
-                                except:
-                                    continue
-                    except Exception as e:
-                        logger.warning(f"⚠️ Erro ao procurar pop-up de mudança de odds: {str(e)}")
-                
-                if yes_button:
-                    # Scroll para o elemento se necessário
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", yes_button)
-                    time.sleep(0.5)  # Otimizado agressivamente
-                    
-                    try:
-                        yes_button.click()
-                        logger.info("✅ Clique no botão 'Sim' realizado")
-                    except Exception as click_error:
-                        logger.warning(f"⚠️ Clique normal no 'Sim' falhou, tentando JavaScript: {click_error}")
-                        self.driver.execute_script("arguments[0].click();", yes_button)
-                        logger.info("✅ Clique via JavaScript no 'Sim' realizado")
-                    
-                    time.sleep(1)  # Aguardar para possível segundo pop-up (otimizado agressivamente)
-                    
-                    # Verificar se apareceu pop-up de mudança de odds
-                    logger.info("🔍 Verificando se apareceu pop-up de mudança de odds...")
-                    try:
-                        # Seletores específicos para pop-up de mudança de odds
-                        odds_popup_selectors = [
-                            "/html/body/div[3]/div/div[2]/div[3]/a[2]",  # XPath específico
-                            "a.v-dialog-btn:nth-child(2)",  # CSS específico
-                            "//div[contains(text(), 'Mudança de prêmio')]//following-sibling::*//a[contains(text(), 'SIM')]",
-                            "//div[contains(text(), 'Deseja continuar?')]//following-sibling::*//a[contains(text(), 'SIM')]"
-                        ]
-                        
-                        odds_yes_button = None
-                        for selector in odds_popup_selectors:
-                            try:
-                                if selector.startswith("/"):
-                                    odds_yes_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                                else:
-                                    odds_yes_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                                logger.info(f"✅ Pop-up de mudança de odds encontrado: {selector}")
-                                break
-                            except:
-                                continue
-                        
-                        if odds_yes_button:
-                            logger.info("🖱️ Clicando no 'SIM' do pop-up de mudança de odds...")
-                            try:
-                                odds_yes_button.click()
-                                logger.info("✅ Clique no 'SIM' do pop-up de mudança de odds realizado")
-                            except Exception as click_error:
-                                logger.warning(f"⚠️ Clique normal falhou, tentando JavaScript: {click_error}")
-                                self.driver.execute_script("arguments[0].click();", odds_yes_button)
-                                logger.info("✅ Clique via JavaScript no 'SIM' do pop-up realizado")
-                            time.sleep(1)  # Otimizado agressivamente
-                        else:
-                            logger.info("ℹ️ Nenhum pop-up de mudança de odds encontrado")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Erro ao verificar pop-up de mudança de odds: {str(e)}")
-                    
-                    time.sleep(1)  # Aguardar final (otimizado agressivamente)
-                    
-                    # Verificar se houve confirmação (procurar por mensagem de sucesso ou mudança na URL)
-                    current_url = self.driver.current_url
-                    logger.info(f"📍 URL atual após confirmação: {current_url}")
-                    
-                    # Se foi redirecionado para /bets, confirmação foi bem-sucedida
-                    if "/bets" in current_url:
-                        logger.info("✅ Redirecionado para página de apostas - confirmação bem-sucedida")
-                        return True
-                    
-                    # Se foi redirecionado para home, verificar se realmente foi confirmado
-                    if current_url == f"{self.base_url}/" or current_url == self.base_url:
-                        logger.info("🔍 Verificando se a aposta foi realmente confirmada...")
-                        
-                        # Verificar se há mensagem de sucesso na página atual
-                        try:
-                            success_messages = [
-                                "//*[contains(text(), 'aposta confirmada')]",
-                                "//*[contains(text(), 'aposta realizada')]",
-                                "//*[contains(text(), 'sucesso')]",
-                                "//*[contains(text(), 'confirmada')]"
-                            ]
-                            
-                            for msg_selector in success_messages:
-                                try:
-                                    success_element = self.driver.find_element(By.XPATH, msg_selector)
-                                    if success_element and success_element.is_displayed():
-                                        logger.info("✅ Mensagem de sucesso encontrada - confirmação bem-sucedida")
-                                        return True
-                                except:
-                                    continue
-                        except:
-                            pass
-                        
-                        # Navegar para a página de apostas para verificar
-                        self.driver.get(f"{self.base_url}/bets")
-                        time.sleep(2)
-                        
-                        # Verificar se há apostas abertas ou se foi movida para apostas confirmadas
-                        try:
-                            # Procurar por mensagem "Nenhuma aposta encontrada"
-                            no_bets_element = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Nenhuma aposta encontrada')]")
-                            if no_bets_element:
-                                logger.info("ℹ️ Nenhuma aposta aberta encontrada - pode ter sido confirmada e movida")
-                                # Verificar se há apostas confirmadas
-                                self.driver.get(f"{self.base_url}/bets?status=confirmed")
-                                time.sleep(2)
-                                
-                                # Se chegou até aqui sem erro, assumir sucesso
-                                logger.info("✅ Aposta provavelmente confirmada com sucesso")
-                                return True
-                        except:
-                            # Se não encontrou a mensagem, pode ter apostas
-                            logger.info("✅ Apostas encontradas - confirmação bem-sucedida")
-                            return True
-                    
-                    # Se ainda está na página do bilhete, confirmação falhou
-                    if f"/prebet/{bet_code}" in current_url:
-                        logger.error("❌ Ainda na página do bilhete - confirmação falhou")
-                        self.driver.save_screenshot(f"confirmation_failed_{bet_code}.png")
-                        return False
-                    
-                    # Para qualquer outro caso, assumir sucesso
-                    logger.info("✅ Confirmação concluída com sucesso")
-                    return True
-                else:
-                    logger.warning("⚠️ Botão 'Sim' não encontrado")
-                    # Salvar screenshot para debug
-                    self.driver.save_screenshot(f"confirm_final_{bet_code}.png")
-                    return False
-                
-                # Se chegou até aqui, verificar se realmente foi confirmado
-                logger.info("✅ Processo de confirmação concluído - verificando resultado")
-                
-            except TimeoutException:
-                logger.error("❌ Timeout - elementos não encontrados")
-                self.driver.save_screenshot(f"timeout_error_{bet_code}.png")
-                return False
+            self.use_resource_profile('confirm')
+            
+            # Captura e confirmação seguidas no mesmo scraper: o bilhete já está na tela
+            reuse_page = self.loaded_bet_code == bet_code and time.time() - self.loaded_bet_at < PREBET_REUSE_MAX_AGE
+            self.loaded_bet_code = None
+            engine = ConfirmEngine(self.driver, self.base_url, bet_code, reuse_page=reuse_page)
+            confirmed = engine.run()
+            self.last_verification = engine.verification
+            return confirmed
                 
         except Exception as e:
             logger.error(f"❌ Erro ao confirmar aposta: {str(e)}")
-            self.driver.save_screenshot(f"error_{bet_code}.png")
+            self._save_debug_artifacts(f"error_{bet_code}", failed=True)
             return False
     
     def close(self):